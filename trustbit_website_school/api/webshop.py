@@ -3,8 +3,52 @@
 
 import frappe
 from frappe import _
-from frappe.utils import today, add_days, getdate, flt, cint
+from frappe.utils import flt, cint
+from frappe.rate_limiter import rate_limit
+import base64
+import hashlib
 import json
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from trustbit_website_school.cart_summary import get_cached_cart_summary
+from trustbit_website_school.contact_queue import queue_contact_submission
+from trustbit_website_school.facets import DIMENSIONS as FACET_DIMENSIONS, get_facet_counts, get_facet_total
+from trustbit_website_school.images import add_image_variants
+from trustbit_website_school.order_status import get_order_status
+from trustbit_website_school.profiling import instrument
+from trustbit_website_school.warmup import record_search_term
+from trustbit_website_school.trustbit_website_school.doctype.trustbit_search_index.trustbit_search_index import search_index
+from trustbit_website_school.trustbit_website_school.doctype.trustbit_settings.trustbit_settings import (
+    get_trustbit_settings, get_selling_price_list, get_default_warehouse
+)
+
+CATEGORY_CACHE_KEY = "trustbit_categories"
+CATEGORY_CACHE_TTL = 6 * 60 * 60
+TRENDING_CACHE_KEY = "trustbit_trending_products"
+TRENDING_CACHE_TTL = 60 * 60
+BUNDLE_COMPOSITION_CACHE_KEY = "trustbit_bundle_composition"
+BUNDLE_COMPOSITION_TTL = 24 * 60 * 60
+BUNDLE_SUMMARY_CACHE_KEY = "trustbit_bundle_summary"
+BUNDLE_SUMMARY_TTL = 10 * 60
+HOMEPAGE_CACHE_KEY = "trustbit_homepage_section"
+CART_LOCK_KEY = "trustbit_cart_lock"
+CART_LOCK_TIMEOUT = 30
+COUNT_CACHE_KEY = "trustbit_count"
+COUNT_CACHE_TTL = 5 * 60
+ORDER_COUNT_CACHE_TTL = 60
+# Public order tracking: requests per minute per IP / per order id
+TRACK_ORDER_IP_LIMIT = 30
+TRACK_ORDER_ORDER_LIMIT = 120
+# Contact form submissions per hour per IP
+CONTACT_FORM_IP_LIMIT = 20
+
+# Supported listing sorts -> (keyset column, direction)
+KEYSET_SORTS = {
+    "item_name": ("item_name", "asc"),
+    "creation desc": ("creation", "desc"),
+    "modified desc": ("modified", "desc"),
+}
 
 
 # ============================================
@@ -12,30 +56,130 @@ import json
 # ============================================
 
 @frappe.whitelist(allow_guest=True)
-def get_homepage_data():
-    """Get all data needed for homepage"""
-    settings = frappe.get_single("Trustbit Settings")
+@instrument
+def get_homepage_data(etag=None):
+    """Get all data needed for homepage
+
+    Supports conditional requests: when the If-None-Match header (or the
+    `etag` argument) matches the current data, responds 304 with no body.
+    """
+    data = get_homepage_sections()
+    current_etag = hashlib.md5(frappe.as_json(data).encode()).hexdigest()
     
-    return {
-        "hero": {
-            "image": settings.hero_image,
-            "title": settings.hero_title,
-            "subtitle": settings.hero_subtitle,
-            "button_text": settings.hero_button_text,
-            "button_link": settings.hero_button_link,
-            "sale_banner": settings.sale_banner_text if settings.sale_banner_active else None,
-        },
-        "categories": get_categories(),
-        "latest_products": get_latest_products(settings.latest_products_count or 8) if settings.show_latest_products else [],
-        "trending_products": get_trending_products(settings.trending_products_count or 8, settings.trending_days_range or 30) if settings.show_trending_products else [],
-        "banners": get_active_banners(),
-        "stats": get_store_stats(),
+    response_headers = getattr(frappe.local, "response_headers", None)
+    if response_headers is not None:
+        response_headers.set("ETag", f'"{current_etag}"')
+        response_headers.set("Cache-Control", "no-cache")
+    
+    request_etag = frappe.get_request_header("If-None-Match") if frappe.request else None
+    if_none_match = (request_etag or etag or "").strip('W/"')
+    if if_none_match == current_etag:
+        frappe.local.response.http_status_code = 304
+        return None
+    
+    data["etag"] = current_etag
+    return data
+
+
+def get_homepage_sections(names=None):
+    """Get homepage sections (all, or only `names`), each cached on its own tags and TTL
+
+    Sections missing from cache are built concurrently on a small thread pool
+    (size from site config `trustbit_homepage_workers`, default 3).
+    """
+    from trustbit_website_school.page_cache import get_cache_ttl, get_tagged_cache_key
+    
+    names = names or list(HOMEPAGE_SECTIONS)
+    sections = {}
+    missing = {}
+    for name in names:
+        builder, tags, ttl = HOMEPAGE_SECTIONS[name]
+        cache_key = get_tagged_cache_key(HOMEPAGE_CACHE_KEY, name, tags)
+        section = frappe.cache().get_value(cache_key)
+        if section is None:
+            missing[name] = (cache_key, tags, ttl)
+        else:
+            sections[name] = section
+    
+    built = build_sections({name: HOMEPAGE_SECTIONS[name][0] for name in missing})
+    for name, section in built.items():
+        cache_key, tags, ttl = missing[name]
+        frappe.cache().set_value(cache_key, section, expires_in_sec=get_cache_ttl(ttl, tags))
+        sections[name] = section
+    
+    return {name: sections[name] for name in names}
+
+
+def build_sections(builders):
+    """Run independent section builders, in parallel when more than one is due"""
+    workers = min(cint(frappe.conf.get("trustbit_homepage_workers", 3)), len(builders))
+    if workers <= 1:
+        return {name: builder() for name, builder in builders.items()}
+    
+    site, sites_path = frappe.local.site, frappe.local.sites_path
+    user, lang = frappe.session.user, frappe.local.lang
+    
+    def run(builder):
+        # Each thread needs its own site context and database connection
+        frappe.init(site=site, sites_path=sites_path)
+        try:
+            frappe.connect()
+            frappe.set_user(user)
+            frappe.local.lang = lang
+            return builder()
+        finally:
+            frappe.destroy()
+    
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {name: pool.submit(run, builder) for name, builder in builders.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+
+def build_hero_section():
+    settings = get_trustbit_settings()
+    hero = {
+        "image": settings.hero_image,
+        "title": settings.hero_title,
+        "subtitle": settings.hero_subtitle,
+        "button_text": settings.hero_button_text,
+        "button_link": settings.hero_button_link,
+        "sale_banner": settings.sale_banner_text if settings.sale_banner_active else None,
     }
+    add_image_variants([hero])
+    return hero
+
+
+def build_latest_products_section():
+    settings = get_trustbit_settings()
+    if not settings.show_latest_products:
+        return []
+    
+    return get_latest_products(settings.latest_products_count or 8)
+
+
+def build_trending_products_section():
+    settings = get_trustbit_settings()
+    if not settings.show_trending_products:
+        return []
+    
+    return get_trending_products(settings.trending_products_count or 8, settings.trending_days_range or 30)
 
 
 @frappe.whitelist(allow_guest=True)
+@instrument
 def get_categories():
     """Get all item groups with product counts"""
+    categories = frappe.cache().get_value(CATEGORY_CACHE_KEY)
+    
+    if categories is None:
+        categories = build_categories()
+        frappe.cache().set_value(CATEGORY_CACHE_KEY, categories, expires_in_sec=CATEGORY_CACHE_TTL)
+    
+    return categories
+
+
+def build_categories():
+    """Build item groups with product counts from a single aggregate query"""
     item_groups = frappe.get_all(
         "Item Group",
         filters={
@@ -45,18 +189,55 @@ def get_categories():
         order_by="name asc"
     )
 
+    counts = dict(frappe.db.sql("""
+        SELECT item_group, COUNT(*)
+        FROM `tabItem`
+        WHERE disabled = 0
+        GROUP BY item_group
+    """))
+
     for group in item_groups:
-        group["count"] = frappe.db.count("Item", {
-            "item_group": group["name"],
-            "disabled": 0
-        })
+        group["count"] = cint(counts.get(group["name"]))
         group["icon"] = group.get("trustbit_icon") or "📦"
         group["color"] = group.get("trustbit_color") or "#7c3aed"
 
-    return item_groups
+    return add_image_variants(item_groups)
+
+
+def update_category_counts(doc, method=None):
+    """Item doc_event: adjust cached category counts instead of rebuilding"""
+    before = doc.get_doc_before_save() if method != "on_trash" else doc
+    old_group = before.item_group if before and not before.disabled else None
+    new_group = doc.item_group if method != "on_trash" and not doc.disabled else None
+    
+    if old_group == new_group:
+        return
+    
+    # Only once the save is committed: a rolled back save must not move counts
+    frappe.db.after_commit.add(partial(move_category_count, old_group, new_group))
+
+
+def move_category_count(old_group, new_group):
+    categories = frappe.cache().get_value(CATEGORY_CACHE_KEY)
+    if categories is None:
+        return
+    
+    for group in categories:
+        if group["name"] == old_group:
+            group["count"] = max(group["count"] - 1, 0)
+        if group["name"] == new_group:
+            group["count"] += 1
+    
+    frappe.cache().set_value(CATEGORY_CACHE_KEY, categories, expires_in_sec=CATEGORY_CACHE_TTL)
+
+
+def clear_category_cache(doc=None, method=None):
+    """Item Group doc_event: drop the cached category tree"""
+    frappe.cache().delete_value(CATEGORY_CACHE_KEY)
 
 
 @frappe.whitelist(allow_guest=True)
+@instrument
 def get_latest_products(limit=8):
     """Get latest products by creation date"""
     items = frappe.get_all(
@@ -73,54 +254,58 @@ def get_latest_products(limit=8):
         limit_page_length=cint(limit)
     )
 
+    set_price_and_stock(items)
     for item in items:
-        item["price"] = get_item_price(item["item_code"])
-        item["stock"] = get_item_stock(item["item_code"])
         item["tag"] = "New Arrival"
 
-    return items
+    return add_image_variants(items)
 
 
 @frappe.whitelist(allow_guest=True)
+@instrument
 def get_trending_products(limit=8, days=30):
     """Get trending products based on sales in last N days"""
-    from_date = add_days(today(), -cint(days))
-    
-    trending = frappe.db.sql("""
-        SELECT
-            sii.item_code,
-            SUM(sii.qty) as total_qty
-        FROM `tabSales Invoice Item` sii
-        INNER JOIN `tabSales Invoice` si ON si.name = sii.parent
-        WHERE si.docstatus = 1
-            AND si.posting_date >= %s
-            AND EXISTS (
-                SELECT 1 FROM `tabItem` i
-                WHERE i.item_code = sii.item_code
-                AND i.disabled = 0
-            )
-        GROUP BY sii.item_code
-        ORDER BY total_qty DESC
-        LIMIT %s
-    """, (from_date, cint(limit)), as_dict=True)
+    trending = get_trending_sales_cached(limit, days)
     
+    item_codes = [t["item_code"] for t in trending]
+    item_details = get_item_details(item_codes)
+    prices = get_item_prices(item_codes)
+    stocks = get_item_stocks(item_codes)
+
     items = []
     for t in trending:
-        item = frappe.get_doc("Item", t["item_code"])
+        item = item_details.get(t["item_code"])
+        if not item:
+            continue
         items.append({
             "item_code": item.item_code,
             "item_name": item.item_name,
             "item_group": item.item_group,
             "image": item.image,
-            "price": get_item_price(item.item_code),
-            "stock": get_item_stock(item.item_code),
+            "price": prices.get(item.item_code, 0),
+            "stock": stocks.get(item.item_code, 0),
             "sales": int(t["total_qty"])
         })
 
-    return items
+    return add_image_variants(items)
+
+
+def get_trending_sales_cached(limit=8, days=30):
+    """Trending item codes and quantities from the daily sales rollup, cached"""
+    from trustbit_website_school.trustbit_website_school.doctype.trustbit_item_sales.trustbit_item_sales import get_trending_sales
+    
+    cache_key = f"{TRENDING_CACHE_KEY}::{cint(days)}::{cint(limit)}"
+    trending = frappe.cache().get_value(cache_key)
+    
+    if trending is None:
+        trending = get_trending_sales(limit, days)
+        frappe.cache().set_value(cache_key, trending, expires_in_sec=TRENDING_CACHE_TTL)
+    
+    return trending
 
 
 @frappe.whitelist(allow_guest=True)
+@instrument
 def get_active_banners():
     """Get active banners"""
     from trustbit_website_school.trustbit_website_school.doctype.trustbit_banner.trustbit_banner import get_banners
@@ -128,8 +313,13 @@ def get_active_banners():
 
 
 @frappe.whitelist(allow_guest=True)
+@instrument
 def get_store_stats():
     """Get store statistics"""
+    return get_homepage_sections(["stats"])["stats"]
+
+
+def build_store_stats():
     return {
         "total_products": frappe.db.count("Item", {"disabled": 0, "is_sales_item": 1}),
         "total_bundles": frappe.db.count("Product Bundle"),
@@ -137,13 +327,25 @@ def get_store_stats():
     }
 
 
+# Homepage section -> (builder, cache tags, ttl in seconds)
+HOMEPAGE_SECTIONS = {
+    "hero": (build_hero_section, ("settings",), 3600),
+    "categories": (get_categories, ("categories",), 600),
+    "latest_products": (build_latest_products_section, ("items", "settings"), 300),
+    "trending_products": (build_trending_products_section, ("items", "settings"), 900),
+    "banners": (get_active_banners, ("banners",), 600),
+    "stats": (build_store_stats, ("items", "bundles", "categories"), 900),
+}
+
+
 # ============================================
 # SEARCH APIs
 # ============================================
 
 @frappe.whitelist(allow_guest=True)
+@instrument
 def search_items(query, filters=None, limit=10):
-    """Fast search for 25K+ items"""
+    """Fast search for 25K+ items, served from the Trustbit Search Index"""
     if not query or len(query) < 2:
         return []
     
@@ -156,94 +358,48 @@ def search_items(query, filters=None, limit=10):
     else:
         filters = {}
     
-    search_conditions = """
-        (
-            item_code LIKE %(search)s
-            OR item_name LIKE %(search)s
-            OR barcode LIKE %(search)s
-            OR description LIKE %(search)s
-        )
-    """
-    
-    base_filters = """
-        disabled = 0
-        AND is_sales_item = 1
-    """
-    
-    additional_filters = ""
-    if filters.get("item_group"):
-        additional_filters += f" AND item_group = %(item_group)s"
-    if filters.get("school"):
-        additional_filters += f" AND trustbit_school = %(school)s"
-    if filters.get("class"):
-        additional_filters += f" AND trustbit_class = %(class)s"
-    
-    items = frappe.db.sql(f"""
-        SELECT
-            item_code, item_name, item_group, image,
-            description, stock_uom, barcode
-        FROM `tabItem`
-        WHERE {base_filters}
-            AND {search_conditions}
-            {additional_filters}
-        ORDER BY
-            CASE
-                WHEN item_code = %(exact)s THEN 1
-                WHEN item_code LIKE %(starts)s THEN 2
-                WHEN item_name LIKE %(starts)s THEN 3
-                ELSE 4
-            END,
-            item_name ASC
-        LIMIT %(limit)s
-    """, {
-        "search": f"%{query}%",
-        "exact": query,
-        "starts": f"{query}%",
-        "item_group": filters.get("item_group"),
-        "school": filters.get("school"),
-        "class": filters.get("class"),
-        "limit": limit
-    }, as_dict=True)
+    record_search_term(query)
+    items = search_index(query, filters=filters, limit=limit)
 
+    set_price_and_stock(items)
     for item in items:
-        item["price"] = get_item_price(item["item_code"])
-        item["stock"] = get_item_stock(item["item_code"])
         item["type"] = "item"
     
     if not filters.get("type") or filters.get("type") == "bundles":
         bundles = search_bundles(query, limit=5)
         items = bundles + items
     
-    return items[:limit]
+    return add_image_variants(items[:limit])
+
+
+@frappe.whitelist(allow_guest=True)
+@instrument
+def autocomplete(query, limit=8, filters=None):
+    """Prefix suggestions for the live search dropdown, answered from memory"""
+    from trustbit_website_school.autocomplete import autocomplete as get_suggestions
+    
+    if not query or len(query.strip()) < 2:
+        return []
+    
+    if isinstance(filters, str):
+        filters = json.loads(filters)
+    
+    return add_image_variants(
+        get_suggestions(query, limit=min(cint(limit) or 8, 20), filters=filters)
+    )
 
 
 def search_bundles(query, limit=5):
     """Search product bundles"""
-    bundles = frappe.db.sql("""
-        SELECT
-            pb.name as item_code,
-            pb.new_item_code,
-            i.item_name,
-            i.image,
-            i.description
-        FROM `tabProduct Bundle` pb
-        INNER JOIN `tabItem` i ON i.item_code = pb.new_item_code
-        WHERE (
-            pb.new_item_code LIKE %(search)s
-            OR i.item_name LIKE %(search)s
-        )
-        AND i.disabled = 0
-        LIMIT %(limit)s
-    """, {
-        "search": f"%{query}%",
-        "limit": limit
-    }, as_dict=True)
+    bundles = search_index(query, limit=limit, bundles=True)
+    summaries = get_bundle_summaries([b["new_item_code"] for b in bundles])
 
     for bundle in bundles:
         bundle["item_code"] = bundle["new_item_code"]
         bundle["type"] = "bundle"
-        bundle["price"] = get_bundle_price(bundle["item_code"])
-        bundle["item_count"] = frappe.db.count("Product Bundle Item", {"parent": bundle["item_code"]})
+        summary = summaries.get(bundle["item_code"]) or {}
+        bundle["price"] = summary.get("price", 0)
+        bundle["item_count"] = summary.get("item_count", 0)
 
     return bundles
 
@@ -253,11 +409,24 @@ def search_bundles(query, limit=5):
 # ============================================
 
 @frappe.whitelist(allow_guest=True)
-def get_bundles(limit=20, page=1):
-    """Get all product bundles with details"""
-    offset = (cint(page) - 1) * cint(limit)
+@instrument
+def get_bundles(limit=20, page=1, after=None, with_total=1, school=None, school_class=None,
+        category=None, with_facets=0):
+    """Get all product bundles with details
+
+    Pass the previous response's `next_cursor` as `after` to page without
+    OFFSET; `page` is still honoured when no cursor is given. Bundles can be
+    filtered by school, class and category; totals and facet counts come
+    from the precomputed facet counts.
+    """
+    limit = cint(limit) or 20
+    facet_filters = {"school": school, "class": school_class, "category": category}
+    keyset_condition, order_by, params = get_keyset_clauses(
+        "item_name", after=after, page=page, limit=limit, alias="i."
+    )
+    filter_condition = get_facet_filter_conditions(facet_filters, params, alias="i.")
     
-    bundles = frappe.db.sql("""
+    bundles = frappe.db.sql(f"""
         SELECT
             pb.name,
             pb.new_item_code as item_code,
@@ -266,32 +435,70 @@ def get_bundles(limit=20, page=1):
             i.image,
             i.description,
             i.trustbit_school as school,
-            i.trustbit_class as class
+            i.trustbit_class as class,
+            i.item_name as _sort_value,
+            i.name as _cursor_name
         FROM `tabProduct Bundle` pb
         INNER JOIN `tabItem` i ON i.item_code = pb.new_item_code
         WHERE i.disabled = 0
-        ORDER BY i.item_name ASC
+            {filter_condition}
+            {keyset_condition}
+        ORDER BY {order_by}
         LIMIT %(limit)s OFFSET %(offset)s
-    """, {"limit": cint(limit), "offset": offset}, as_dict=True)
+    """, params, as_dict=True)
+    next_cursor = pop_next_cursor(bundles, "item_name", limit)
+
+    bundle_items = get_bundle_items_map([b["item_code"] for b in bundles])
 
     for bundle in bundles:
-        bundle["items"] = get_bundle_items(bundle["item_code"])
-        bundle["price"] = sum(item["amount"] for item in bundle["items"])
-        bundle["item_count"] = len(bundle["items"])
-        bundle["availability"] = get_bundle_availability(bundle["item_code"])
-    
-    total = frappe.db.count("Product Bundle")
+        bundle["items"] = bundle_items.get(bundle["item_code"], [])
+        bundle.update(set_bundle_summary(bundle["item_code"], bundle["items"]))
+    add_image_variants(bundles)
     
-    return {
+    result = {
         "bundles": bundles,
-        "total": total,
+        "next_cursor": next_cursor,
         "page": page,
         "limit": limit,
-        "total_pages": (total + limit - 1) // limit
     }
+    
+    if cint(with_total):
+        total = get_facet_total("bundles", facet_filters)
+        result.update({"total": total, "total_pages": (total + limit - 1) // limit})
+    
+    if cint(with_facets):
+        result["facets"] = get_facet_counts("bundles", facet_filters)
+    
+    return result
 
 
 @frappe.whitelist(allow_guest=True)
+@instrument
+def get_facets(scope="bundles", school=None, school_class=None, category=None):
+    """School, class and category facet counts for items or bundles"""
+    if scope not in ("items", "bundles"):
+        frappe.throw(_("Invalid scope"))
+    
+    facet_filters = {"school": school, "class": school_class, "category": category}
+    return {
+        "facets": get_facet_counts(scope, facet_filters),
+        "total": get_facet_total(scope, facet_filters),
+    }
+
+
+def get_facet_filter_conditions(facet_filters, params, alias=""):
+    """SQL conditions (and params) for the indexed school/class/category columns"""
+    conditions = []
+    for dimension, value in facet_filters.items():
+        if value:
+            params[f"facet_{dimension}"] = value
+            conditions.append(f"AND {alias}{FACET_DIMENSIONS[dimension]} = %(facet_{dimension})s")
+    
+    return " ".join(conditions)
+
+
+@frappe.whitelist(allow_guest=True)
+@instrument
 def get_bundle_detail(item_code):
     """Get detailed bundle information"""
     if not frappe.db.exists("Product Bundle", {"new_item_code": item_code}):
@@ -300,7 +507,7 @@ def get_bundle_detail(item_code):
     item = frappe.get_doc("Item", item_code)
     bundle_items = get_bundle_items(item_code)
 
-    return {
+    detail = {
         "item_code": item_code,
         "item_name": item.item_name,
         "description": item.description,
@@ -310,59 +517,203 @@ def get_bundle_detail(item_code):
         "items": bundle_items,
         "total_price": sum(i["amount"] for i in bundle_items),
         "item_count": len(bundle_items),
-        "availability": get_bundle_availability(item_code),
+        "availability": calculate_bundle_availability(bundle_items),
         "out_of_stock_items": [i for i in bundle_items if i["stock"] <= 0]
     }
+    add_image_variants([detail])
+    return detail
 
 
 @frappe.whitelist(allow_guest=True)
+@instrument
 def get_bundle_items(item_code):
     """Get items in a product bundle with stock and price"""
-    bundle_items = frappe.get_all(
-        "Product Bundle Item",
-        filters={"parent": item_code},
-        fields=["item_code", "qty", "description", "uom"]
-    )
-    
-    items = []
-    for bi in bundle_items:
-        item = frappe.get_doc("Item", bi["item_code"])
-        price = get_item_price(bi["item_code"])
-        stock = get_item_stock(bi["item_code"])
-        
-        items.append({
-            "item_code": bi["item_code"],
-            "item_name": item.item_name,
-            "qty": bi["qty"],
-            "uom": bi["uom"] or item.stock_uom,
-            "rate": price,
-            "amount": price * bi["qty"],
-            "stock": stock,
-            "image": item.image,
-            "in_stock": stock >= bi["qty"]
-        })
-    
-    return items
+    return get_bundle_items_map([item_code]).get(item_code, [])
 
 
 @frappe.whitelist(allow_guest=True)
+@instrument
 def get_bundle_availability(item_code):
     """Calculate how many complete bundles can be made from stock"""
-    bundle_items = frappe.get_all(
+    summary = get_bundle_summaries([item_code]).get(item_code)
+    
+    if not summary or not summary["item_count"]:
+        return 0
+    
+    return summary["availability"]
+
+
+def get_bundle_items_map(bundle_codes):
+    """Get items with stock and price for many bundles at once
+
+    Returns a dict of bundle item code -> list of bundle items. Compositions
+    come from cache, and components of every bundle are priced and stocked in
+    a single pass.
+    """
+    compositions = get_bundle_compositions(bundle_codes)
+
+    item_codes = [c["item_code"] for components in compositions.values() for c in components]
+    prices = get_item_prices(item_codes)
+    stocks = get_item_stocks(item_codes)
+
+    items_map = {}
+    for bundle_code, components in compositions.items():
+        items_map[bundle_code] = []
+        for component in components:
+            price = prices.get(component["item_code"], 0)
+            stock = stocks.get(component["item_code"], 0)
+
+            items_map[bundle_code].append(dict(
+                component,
+                rate=price,
+                amount=price * component["qty"],
+                stock=stock,
+                in_stock=stock >= component["qty"]
+            ))
+
+    return items_map
+
+
+def get_bundle_compositions(bundle_codes):
+    """Get cached bundle components (item_code, item_name, qty, uom, image)
+
+    Compositions only change with the Product Bundle or the component Items,
+    so they are cached per bundle and invalidated from those doc_events.
+    """
+    compositions = {}
+    missing = []
+    
+    for code in set(filter(None, bundle_codes)):
+        composition = frappe.cache().get_value(get_bundle_cache_key(BUNDLE_COMPOSITION_CACHE_KEY, code))
+        if composition is None:
+            missing.append(code)
+        else:
+            compositions[code] = composition
+    
+    if not missing:
+        return compositions
+    
+    rows = frappe.db.sql("""
+        SELECT
+            pbi.parent, pbi.item_code, pbi.qty, pbi.uom,
+            i.item_name, i.stock_uom, i.image
+        FROM `tabProduct Bundle Item` pbi
+        LEFT JOIN `tabItem` i ON i.name = pbi.item_code
+        WHERE pbi.parent IN %(bundles)s
+        ORDER BY pbi.parent, pbi.idx
+    """, {"bundles": missing}, as_dict=True)
+    
+    built = {code: [] for code in missing}
+    for row in rows:
+        built[row.parent].append({
+            "item_code": row.item_code,
+            "item_name": row.item_name or row.item_code,
+            "qty": flt(row.qty),
+            "uom": row.uom or row.stock_uom,
+            "image": row.image
+        })
+    add_image_variants([component for composition in built.values() for component in composition])
+    
+    for code, composition in built.items():
+        frappe.cache().set_value(
+            get_bundle_cache_key(BUNDLE_COMPOSITION_CACHE_KEY, code),
+            composition,
+            expires_in_sec=BUNDLE_COMPOSITION_TTL
+        )
+    
+    compositions.update(built)
+    return compositions
+
+
+def get_bundle_summaries(bundle_codes):
+    """Get cached price, item count and availability per bundle
+
+    Summaries depend on component prices and stock, so they are invalidated
+    from Item Price, Bin and Stock Ledger Entry doc_events and also expire
+    after a few minutes.
+    """
+    summaries = {}
+    missing = []
+    
+    for code in set(filter(None, bundle_codes)):
+        summary = frappe.cache().get_value(get_bundle_cache_key(BUNDLE_SUMMARY_CACHE_KEY, code))
+        if summary is None:
+            missing.append(code)
+        else:
+            summaries[code] = summary
+    
+    for code, items in get_bundle_items_map(missing).items():
+        summaries[code] = set_bundle_summary(code, items)
+    
+    return summaries
+
+
+def set_bundle_summary(bundle_code, bundle_items):
+    """Cache the summary of an already priced and stocked bundle"""
+    summary = {
+        "price": sum(item["amount"] for item in bundle_items),
+        "item_count": len(bundle_items),
+        "availability": calculate_bundle_availability(bundle_items)
+    }
+    
+    frappe.cache().set_value(
+        get_bundle_cache_key(BUNDLE_SUMMARY_CACHE_KEY, bundle_code),
+        summary,
+        expires_in_sec=BUNDLE_SUMMARY_TTL
+    )
+    
+    return summary
+
+
+def get_bundle_cache_key(prefix, bundle_code):
+    return f"{prefix}::{bundle_code}"
+
+
+def clear_bundle_cache(doc, method=None):
+    """Product Bundle doc_event: drop cached composition and summary"""
+    clear_bundle_cache_for([doc.new_item_code or doc.name], composition=True)
+
+
+def clear_bundle_cache_for_component(doc, method=None):
+    """Item, Item Price, Bin and Stock Ledger Entry doc_event
+
+    Drop cached summaries (and, for Item changes, compositions) of every
+    bundle containing the changed item.
+    """
+    if doc.doctype == "Item":
+        if not (doc.has_value_changed("item_name") or doc.has_value_changed("image")
+                or doc.has_value_changed("stock_uom")):
+            return
+        item_code = doc.name
+    else:
+        item_code = doc.item_code
+    
+    bundle_codes = frappe.get_all(
         "Product Bundle Item",
-        filters={"parent": item_code},
-        fields=["item_code", "qty"]
+        filters={"item_code": item_code, "parenttype": "Product Bundle"},
+        pluck="parent",
+        distinct=True
     )
     
-    if not bundle_items:
-        return 0
+    clear_bundle_cache_for(bundle_codes, composition=doc.doctype == "Item")
+
+
+def clear_bundle_cache_for(bundle_codes, composition=False):
+    keys = [get_bundle_cache_key(BUNDLE_SUMMARY_CACHE_KEY, code) for code in bundle_codes]
+    if composition:
+        keys += [get_bundle_cache_key(BUNDLE_COMPOSITION_CACHE_KEY, code) for code in bundle_codes]
     
+    if keys:
+        frappe.cache().delete_value(keys)
+
+
+def calculate_bundle_availability(bundle_items):
+    """Calculate complete sets possible from already stocked bundle items"""
     min_sets = float('inf')
     limiting_item = None
     
     for bi in bundle_items:
-        stock = get_item_stock(bi["item_code"])
-        sets_possible = stock // bi["qty"] if bi["qty"] > 0 else 0
+        sets_possible = bi["stock"] // bi["qty"] if bi["qty"] > 0 else 0
         
         if sets_possible < min_sets:
             min_sets = sets_possible
@@ -378,36 +729,37 @@ def get_bundle_availability(item_code):
 # CART APIs
 # ============================================
 
+@frappe.whitelist(allow_guest=True, methods=["GET"])
+@instrument
+def get_cart_summary():
+    """Item count and total of the current user's cart, for the header badge"""
+    return get_cached_cart_summary(frappe.session.user)
+
+
 @frappe.whitelist()
+@instrument
 def add_bundle_to_cart(item_code, qty=1):
-    """Add all bundle items to cart"""
-    from webshop.webshop.shopping_cart.cart import add_to_cart
+    """Add all bundle items to cart
+
+    Stock is checked for every component from one snapshot and all lines are
+    written to the cart Quotation with a single save. A per-user lock keeps
+    concurrent clicks from creating or overwriting the cart in parallel.
+    """
+    from webshop.webshop.shopping_cart.cart import _get_cart_quotation, apply_cart_settings, set_cart_count
     
     bundle_items = get_bundle_items(item_code)
-    added_items = []
+    lines = []
     skipped_items = []
     
     for item in bundle_items:
         item_qty = item["qty"] * cint(qty)
         
         if item["stock"] >= item_qty:
-            try:
-                add_to_cart(item["item_code"])
-                if item_qty > 1:
-                    from webshop.webshop.shopping_cart.cart import update_cart
-                    update_cart(item["item_code"], item_qty)
-                
-                added_items.append({
-                    "item_code": item["item_code"],
-                    "item_name": item["item_name"],
-                    "qty": item_qty
-                })
-            except Exception as e:
-                skipped_items.append({
-                    "item_code": item["item_code"],
-                    "item_name": item["item_name"],
-                    "reason": str(e)
-                })
+            lines.append({
+                "item_code": item["item_code"],
+                "item_name": item["item_name"],
+                "qty": item_qty
+            })
         else:
             skipped_items.append({
                 "item_code": item["item_code"],
@@ -415,10 +767,55 @@ def add_bundle_to_cart(item_code, qty=1):
                 "reason": f"Only {item['stock']} available"
             })
     
+    added_items = []
+    if lines:
+        warehouses = dict(frappe.get_all(
+            "Website Item",
+            filters={"item_code": ["in", [line["item_code"] for line in lines]]},
+            fields=["item_code", "website_warehouse"],
+            as_list=True
+        ))
+        
+        lock_name = frappe.cache().make_key(f"{CART_LOCK_KEY}::{frappe.session.user}")
+        try:
+            with frappe.cache().lock(lock_name, timeout=CART_LOCK_TIMEOUT, blocking_timeout=CART_LOCK_TIMEOUT):
+                quotation = _get_cart_quotation()
+                
+                for line in lines:
+                    existing = quotation.get("items", {"item_code": line["item_code"]})
+                    if existing:
+                        existing[0].qty = line["qty"]
+                        existing[0].warehouse = warehouses.get(line["item_code"])
+                    else:
+                        quotation.append("items", {
+                            "doctype": "Quotation Item",
+                            "item_code": line["item_code"],
+                            "qty": line["qty"],
+                            "warehouse": warehouses.get(line["item_code"])
+                        })
+                
+                apply_cart_settings(quotation=quotation)
+                quotation.flags.ignore_permissions = True
+                quotation.payment_schedule = []
+                quotation.save()
+                # Commit before releasing the lock so the next click sees this cart
+                frappe.db.commit()
+            
+            set_cart_count(quotation)
+            added_items = lines
+        except Exception as e:
+            frappe.db.rollback()
+            skipped_items.extend({
+                "item_code": line["item_code"],
+                "item_name": line["item_name"],
+                "reason": str(e)
+            } for line in lines)
+    
     return {
         "success": len(added_items) > 0,
         "added": added_items,
         "skipped": skipped_items,
+        "cart": get_cached_cart_summary(frappe.session.user),
         "message": f"Added {len(added_items)} items to cart" + 
                    (f", {len(skipped_items)} items skipped" if skipped_items else "")
     }
@@ -429,53 +826,68 @@ def add_bundle_to_cart(item_code, qty=1):
 # ============================================
 
 @frappe.whitelist(allow_guest=True)
-def get_category_products(category, limit=20, page=1, sort_by="item_name"):
-    """Get products in a category"""
-    offset = (cint(page) - 1) * cint(limit)
+@instrument
+def get_category_products(category, limit=20, page=1, sort_by="item_name", after=None, with_total=1):
+    """Get products in a category
+
+    Pass the previous response's `next_cursor` as `after` to page without
+    OFFSET; `page` is still honoured when no cursor is given.
+    """
+    limit = cint(limit) or 20
     
-    valid_sorts = ["item_name", "creation desc", "modified desc"]
-    if sort_by not in valid_sorts:
+    if sort_by not in KEYSET_SORTS:
         sort_by = "item_name"
     
-    items = frappe.get_all(
-        "Item",
-        filters={
-            "item_group": category,
-            "disabled": 0
-        },
-        fields=[
-            "item_code", "item_name", "image",
-            "description", "stock_uom"
-        ],
-        order_by=sort_by,
-        limit_page_length=cint(limit),
-        limit_start=offset
-    )
-
-    for item in items:
-        item["price"] = get_item_price(item["item_code"])
-        item["stock"] = get_item_stock(item["item_code"])
+    keyset_condition, order_by, params = get_keyset_clauses(sort_by, after=after, page=page, limit=limit)
+    sort_field = KEYSET_SORTS[sort_by][0]
+    params["category"] = category
+    
+    items = frappe.db.sql(f"""
+        SELECT
+            item_code, item_name, image, description, stock_uom,
+            {sort_field} as _sort_value, name as _cursor_name
+        FROM `tabItem`
+        WHERE item_group = %(category)s
+            AND disabled = 0
+            {keyset_condition}
+        ORDER BY {order_by}
+        LIMIT %(limit)s OFFSET %(offset)s
+    """, params, as_dict=True)
+    next_cursor = pop_next_cursor(items, sort_by, limit)
 
-    total = frappe.db.count("Item", {
-        "item_group": category,
-        "disabled": 0
-    })
+    set_price_and_stock(items)
+    add_image_variants(items)
+    
+    category_info = frappe.get_cached_value(
+        "Item Group", category, ["item_group_name", "image", "trustbit_icon"], as_dict=True
+    )
+    if not category_info:
+        frappe.throw(_("Category not found"))
     
-    category_info = frappe.get_doc("Item Group", category)
+    category_data = {
+        "name": category,
+        "label": category_info.item_group_name,
+        "image": category_info.image,
+        "icon": category_info.trustbit_icon or "📦"
+    }
+    add_image_variants([category_data])
     
-    return {
-        "category": {
-            "name": category,
-            "label": category_info.item_group_name,
-            "image": category_info.image,
-            "icon": category_info.get("trustbit_icon") or "📦"
-        },
+    result = {
+        "category": category_data,
         "items": items,
-        "total": total,
+        "next_cursor": next_cursor,
         "page": page,
         "limit": limit,
-        "total_pages": (total + limit - 1) // limit
     }
+    
+    if cint(with_total):
+        total = get_cached_count(f"category::{category}", lambda: frappe.db.count("Item", {
+            "item_group": category,
+            "disabled": 0
+        }))
+        result.update({"total": total, "total_pages": (total + limit - 1) // limit})
+    
+    return result
 
 
 # ============================================
@@ -483,152 +895,125 @@ def get_category_products(category, limit=20, page=1, sort_by="item_name"):
 # ============================================
 
 @frappe.whitelist()
-def get_order_history(limit=20, page=1):
-    """Get customer's order history"""
+@instrument
+def get_order_history(limit=20, page=1, after=None, with_total=1):
+    """Get customer's order history
+
+    Pass the previous response's `next_cursor` as `after` to page without
+    OFFSET; `page` is still honoured when no cursor is given.
+    """
     customer = get_current_customer()
     if not customer:
         return {"orders": [], "message": "Please login to view orders"}
     
-    offset = (cint(page) - 1) * cint(limit)
-    
-    orders = frappe.get_all(
-        "Sales Order",
-        filters={"customer": customer},
-        fields=[
-            "name", "transaction_date", "status", "grand_total",
-            "total_qty", "delivery_status"
-        ],
-        order_by="creation desc",
-        limit_page_length=cint(limit),
-        limit_start=offset
+    limit = cint(limit) or 20
+    keyset_condition, order_by, params = get_keyset_clauses(
+        "creation desc", after=after, page=page, limit=limit
     )
+    params["customer"] = customer
     
-    for order in orders:
-        order["items_count"] = frappe.db.count("Sales Order Item", {"parent": order["name"]})
-        bundle_items = frappe.db.sql("""
-            SELECT soi.item_code, i.item_name
-            FROM `tabSales Order Item` soi
-            INNER JOIN `tabProduct Bundle` pb ON pb.new_item_code = soi.item_code
-            INNER JOIN `tabItem` i ON i.item_code = soi.item_code
-            WHERE soi.parent = %s
-            LIMIT 1
-        """, order["name"], as_dict=True)
-        
-        if bundle_items:
-            order["bundle"] = bundle_items[0]["item_name"]
+    orders = frappe.db.sql(f"""
+        SELECT
+            name, transaction_date, status, grand_total,
+            total_qty, delivery_status,
+            creation as _sort_value, name as _cursor_name
+        FROM `tabSales Order`
+        WHERE customer = %(customer)s
+            {keyset_condition}
+        ORDER BY {order_by}
+        LIMIT %(limit)s OFFSET %(offset)s
+    """, params, as_dict=True)
+    next_cursor = pop_next_cursor(orders, "creation desc", limit)
     
-    total = frappe.db.count("Sales Order", {"customer": customer})
+    summaries = get_order_summaries([order["name"] for order in orders])
+    for order in orders:
+        summary = summaries.get(order["name"]) or {}
+        order["items_count"] = cint(summary.get("items_count"))
+        if summary.get("bundle"):
+            order["bundle"] = summary["bundle"]
     
-    return {
+    result = {
         "orders": orders,
-        "total": total,
+        "next_cursor": next_cursor,
         "page": page,
-        "total_pages": (total + limit - 1) // limit
     }
+    
+    if cint(with_total):
+        total = get_cached_count(
+            f"orders::{customer}",
+            lambda: frappe.db.count("Sales Order", {"customer": customer}),
+            ttl=ORDER_COUNT_CACHE_TTL
+        )
+        result.update({"total": total, "total_pages": (total + limit - 1) // limit})
+    
+    return result
+
+
+def get_order_summaries(order_names):
+    """Item count and first bundle name for many orders in one grouped query"""
+    if not order_names:
+        return {}
+    
+    summaries = frappe.db.sql("""
+        SELECT
+            soi.parent,
+            COUNT(*) as items_count,
+            SUBSTRING_INDEX(
+                GROUP_CONCAT(
+                    CASE WHEN pb.name IS NOT NULL THEN i.item_name END
+                    ORDER BY soi.idx SEPARATOR '\\n'
+                ),
+                '\\n', 1
+            ) as bundle
+        FROM `tabSales Order Item` soi
+        LEFT JOIN `tabProduct Bundle` pb ON pb.new_item_code = soi.item_code
+        LEFT JOIN `tabItem` i ON i.item_code = soi.item_code
+        WHERE soi.parent IN %(orders)s
+            AND soi.parenttype = 'Sales Order'
+        GROUP BY soi.parent
+    """, {"orders": order_names}, as_dict=True)
+    
+    return {row.parent: row for row in summaries}
 
 
 @frappe.whitelist(allow_guest=True)
+@rate_limit(limit=TRACK_ORDER_IP_LIMIT, seconds=60)
+@rate_limit(key="order_id", limit=TRACK_ORDER_ORDER_LIMIT, seconds=60, ip_based=False)
+@instrument
 def track_order(order_id):
-    """Track order status"""
-    if not frappe.db.exists("Sales Order", order_id):
+    """Track order status (served from the order-status projection)"""
+    projection = get_order_status(order_id)
+    if not projection:
         return {"found": False, "message": "Order not found"}
     
-    order = frappe.get_doc("Sales Order", order_id)
-    
-    delivery_info = {}
-    if order.status in ["Completed", "Closed"] or order.delivery_status == "Fully Delivered":
-        delivery_notes = frappe.get_all(
-            "Delivery Note",
-            filters={"docstatus": 1},
-            fields=["name", "posting_date", "transporter_name", "lr_no"]
-        )
-        if delivery_notes:
-            delivery_info = delivery_notes[0]
-    
     return {
         "found": True,
-        "order": {
-            "id": order.name,
-            "date": order.transaction_date,
-            "status": order.status,
-            "delivery_status": order.delivery_status,
-            "total": order.grand_total,
-            "items_count": len(order.items),
-        },
-        "timeline": get_order_timeline(order),
-        "delivery": delivery_info
+        "order": projection["order"],
+        "timeline": projection["timeline"],
+        "delivery": projection["delivery"]
     }
 
 
-def get_order_timeline(order):
-    """Build order timeline"""
-    timeline = [
-        {
-            "step": "Order Placed",
-            "done": True,
-            "date": str(order.transaction_date)
-        },
-        {
-            "step": "Processing",
-            "done": order.status not in ["Draft", "Cancelled"],
-            "date": str(order.transaction_date) if order.status not in ["Draft", "Cancelled"] else None
-        },
-        {
-            "step": "Shipped",
-            "done": order.delivery_status in ["Partially Delivered", "Fully Delivered"],
-            "date": None
-        },
-        {
-            "step": "Delivered",
-            "done": order.delivery_status == "Fully Delivered" or order.status in ["Completed", "Closed"],
-            "date": None
-        }
-    ]
-    
-    return timeline
-
-
 # ============================================
 # CONTACT APIs
 # ============================================
 
 @frappe.whitelist(allow_guest=True)
+@rate_limit(limit=CONTACT_FORM_IP_LIMIT, seconds=60 * 60)
+@instrument
 def submit_contact_form(name, email, phone, message, subject="Website Enquiry"):
-    """Submit contact form"""
-    doc = frappe.get_doc({
-        "doctype": "Communication",
-        "communication_type": "Communication",
-        "communication_medium": "Email",
-        "subject": f"[Website] {subject}",
-        "content": f"""
-            <p><strong>Name:</strong> {name}</p>
-            <p><strong>Email:</strong> {email}</p>
-            <p><strong>Phone:</strong> {phone}</p>
-            <hr>
-            <p><strong>Message:</strong></p>
-            <p>{message}</p>
-        """,
-        "sender": email,
-        "sent_or_received": "Received"
-    })
-    doc.insert(ignore_permissions=True)
-    
-    settings = frappe.get_single("Trustbit Settings")
-    if settings.email:
-        frappe.sendmail(
-            recipients=[settings.email],
-            subject=f"[Website] New Contact Form: {subject}",
-            message=f"""
-                <h3>New contact form submission</h3>
-                <p><strong>Name:</strong> {name}</p>
-                <p><strong>Email:</strong> {email}</p>
-                <p><strong>Phone:</strong> {phone}</p>
-                <hr>
-                <p><strong>Message:</strong></p>
-                <p>{message}</p>
-            """
-        )
+    """Submit contact form
+
+    The submission is queued and saved by a background job; the store gets
+    a periodic digest email instead of one email per submission.
+    """
+    if not (name or "").strip() or not (message or "").strip():
+        frappe.throw(_("Please enter your name and message"))
+    
+    frappe.utils.validate_email_address(email, throw=True)
+    queue_contact_submission(name, email, phone, message, subject or "Website Enquiry")
     
+    # Duplicates are dropped silently, the sender sees the same confirmation
     return {"success": True, "message": "Thank you! We will get back to you soon."}
 
 
@@ -638,41 +1023,168 @@ def submit_contact_form(name, email, phone, message, subject="Website Enquiry"):
 
 def get_item_price(item_code, price_list=None):
     """Get item selling price"""
+    return get_item_prices([item_code], price_list).get(item_code, 0)
+
+
+def get_item_stock(item_code, warehouse=None):
+    """Get item stock quantity"""
+    return get_item_stocks([item_code], warehouse).get(item_code, 0)
+
+
+def get_item_prices(item_codes, price_list=None):
+    """Get selling prices for many items in one query"""
+    item_codes = list(set(filter(None, item_codes)))
+    if not item_codes:
+        return {}
+    
     if not price_list:
-        price_list = frappe.db.get_single_value("Selling Settings", "selling_price_list") or "Standard Selling"
+        price_list = get_selling_price_list()
     
-    price = frappe.db.get_value(
+    rows = frappe.get_all(
         "Item Price",
-        {"item_code": item_code, "price_list": price_list, "selling": 1},
-        "price_list_rate"
+        filters={
+            "item_code": ["in", item_codes],
+            "price_list": price_list,
+            "selling": 1
+        },
+        fields=["item_code", "price_list_rate"]
     )
     
-    return flt(price) or 0
+    prices = {}
+    for row in rows:
+        prices.setdefault(row["item_code"], flt(row["price_list_rate"]))
+    
+    return {code: prices.get(code, 0) for code in item_codes}
 
 
-def get_item_stock(item_code, warehouse=None):
-    """Get item stock quantity"""
+def get_item_stocks(item_codes, warehouse=None):
+    """Get stock quantities for many items in one query"""
+    item_codes = list(set(filter(None, item_codes)))
+    if not item_codes:
+        return {}
+    
     if not warehouse:
-        warehouse = frappe.db.get_single_value("Stock Settings", "default_warehouse")
+        warehouse = get_default_warehouse()
     
     if warehouse:
-        stock = frappe.db.get_value(
+        rows = frappe.get_all(
             "Bin",
-            {"item_code": item_code, "warehouse": warehouse},
-            "actual_qty"
+            filters={"item_code": ["in", item_codes], "warehouse": warehouse},
+            fields=["item_code", "actual_qty"]
         )
     else:
-        stock = frappe.db.sql("""
-            SELECT SUM(actual_qty) FROM `tabBin` WHERE item_code = %s
-        """, item_code)[0][0]
+        rows = frappe.db.sql("""
+            SELECT item_code, SUM(actual_qty) as actual_qty
+            FROM `tabBin`
+            WHERE item_code IN %(item_codes)s
+            GROUP BY item_code
+        """, {"item_codes": item_codes}, as_dict=True)
     
-    return flt(stock) or 0
+    stocks = {row["item_code"]: flt(row["actual_qty"]) for row in rows}
+    
+    return {code: stocks.get(code, 0) for code in item_codes}
+
+
+def get_item_details(item_codes):
+    """Get display fields for many items in one query"""
+    item_codes = list(set(filter(None, item_codes)))
+    if not item_codes:
+        return {}
+    
+    items = frappe.get_all(
+        "Item",
+        filters={"item_code": ["in", item_codes]},
+        fields=["item_code", "item_name", "item_group", "image", "stock_uom"]
+    )
+    
+    return {item.item_code: item for item in items}
+
+
+def set_price_and_stock(items, price_list=None, warehouse=None):
+    """Set price and stock on a list of item rows with two queries in total"""
+    item_codes = [item["item_code"] for item in items]
+    prices = get_item_prices(item_codes, price_list)
+    stocks = get_item_stocks(item_codes, warehouse)
+    
+    for item in items:
+        item["price"] = prices.get(item["item_code"], 0)
+        item["stock"] = stocks.get(item["item_code"], 0)
+    
+    return items
 
 
 def get_bundle_price(item_code):
     """Get total price of bundle items"""
-    bundle_items = get_bundle_items(item_code)
-    return sum(item["amount"] for item in bundle_items)
+    summary = get_bundle_summaries([item_code]).get(item_code)
+    return summary["price"] if summary else 0
+
+
+def get_keyset_clauses(sort_by, after=None, page=1, limit=20, alias=""):
+    """SQL fragments for keyset pagination on a (sort field, name) key
+
+    Returns (condition, order_by, params). With an `after` cursor the query
+    seeks past the last row seen, so every page costs the same as the first.
+    Without a cursor, numbered pages fall back to OFFSET.
+    """
+    field, direction = KEYSET_SORTS[sort_by]
+    sort_column, name_column = f"{alias}{field}", f"{alias}name"
+    operator = ">" if direction == "asc" else "<"
+    params = {"limit": cint(limit), "offset": 0}
+    condition = ""
+    
+    if after:
+        params["cursor_value"], params["cursor_name"] = decode_cursor(after, sort_by)
+        condition = f"""
+            AND {sort_column} {operator}= %(cursor_value)s
+            AND ({sort_column} {operator} %(cursor_value)s OR {name_column} {operator} %(cursor_name)s)
+        """
+    else:
+        params["offset"] = (max(cint(page), 1) - 1) * cint(limit)
+    
+    return condition, f"{sort_column} {direction}, {name_column} {direction}", params
+
+
+def pop_next_cursor(rows, sort_by, limit):
+    """Strip cursor columns from rows and return the token for the next page"""
+    next_cursor = None
+    if rows and len(rows) >= cint(limit):
+        next_cursor = encode_cursor(sort_by, rows[-1]["_sort_value"], rows[-1]["_cursor_name"])
+    
+    for row in rows:
+        row.pop("_sort_value", None)
+        row.pop("_cursor_name", None)
+    
+    return next_cursor
+
+
+def encode_cursor(sort_by, value, name):
+    payload = json.dumps([sort_by, str(value if value is not None else ""), name])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token, sort_by):
+    try:
+        payload = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        cursor_sort, value, name = json.loads(payload)
+    except Exception:
+        frappe.throw(_("Invalid pagination cursor"))
+    
+    if cursor_sort != sort_by:
+        frappe.throw(_("Pagination cursor does not match the requested sort order"))
+    
+    return value, name
+
+
+def get_cached_count(key, count, ttl=None):
+    """Return a row count cached for a few minutes; `count` computes it on a miss"""
+    cache_key = f"{COUNT_CACHE_KEY}::{key}"
+    total = frappe.cache().get_value(cache_key)
+    
+    if total is None:
+        total = cint(count())
+        frappe.cache().set_value(cache_key, total, expires_in_sec=ttl or COUNT_CACHE_TTL)
+    
+    return total
 
 
 def get_current_customer():
@@ -0,0 +1,31 @@
+# Copyright (c) 2024, Trustbit and contributors
+# For license information, please see license.txt
+
+"""Inline built CSS bundles into shop pages.
+
+The critical storefront CSS is an esbuild bundle like the others, so
+`bench build --production` minifies it; trustbit_base.html inlines the built
+file instead of linking it, saving a render-blocking request.
+"""
+
+import os
+
+import frappe
+from frappe.utils.jinja_globals import bundled_asset
+
+# Built bundle URL -> file contents (None if not built). The URL carries the
+# content hash, so a new build is read again under its new URL
+_inline_bundles = {}
+
+
+def inline_bundle(path):
+    """Contents of a built bundle for a <style> tag, or None if it was not built"""
+    url = bundled_asset(path)
+    if url not in _inline_bundles:
+        try:
+            with open(os.path.join(frappe.local.sites_path, url.lstrip("/"))) as f:
+                _inline_bundles[url] = f.read()
+        except OSError:
+            _inline_bundles[url] = None
+
+    return _inline_bundles[url]
@@ -0,0 +1,168 @@
+# Copyright (c) 2024, Trustbit and contributors
+# For license information, please see license.txt
+
+"""In-process prefix index for the live search dropdown.
+
+Each worker keeps a sorted array of lower-case keys (item codes, barcodes,
+item names and every word of the name) and answers prefix lookups with
+bisect. The array is built from a snapshot of the Trustbit Search Index kept
+in Redis, and rebuilt when the snapshot version changes.
+
+Index changes drop the snapshot and bump the version only after the
+transaction commits, and a snapshot is only stored if the version did not
+move while it was being read, so a rebuild racing a write cannot keep
+uncommitted or outdated rows. The snapshot TTL bounds any remaining drift.
+"""
+
+import re
+from bisect import bisect_left
+
+import frappe
+
+# Entries gained school and class: the old key may still hold the short tuples
+SNAPSHOT_KEY = "trustbit_autocomplete_entries"
+VERSION_KEY = "trustbit_autocomplete_version"
+SNAPSHOT_TTL = 60 * 60
+
+# Per-worker prefix indexes by site: {"version", "keys", "ids", "entries"}
+_prefix_indexes = {}
+
+
+def autocomplete(prefix, limit=8, filters=None):
+    """Return up to `limit` items whose code, barcode or name words start with `prefix`
+
+    `filters` takes the live search filters: type ("items" / "bundles"),
+    school and class.
+    """
+    prefix = (prefix or "").strip().lower()
+    if not prefix:
+        return []
+
+    filters = filters or {}
+    school, class_, item_type = filters.get("school"), filters.get("class"), filters.get("type")
+
+    index = get_prefix_index()
+    keys, ids, entries = index["keys"], index["ids"], index["entries"]
+
+    results = []
+    seen = set()
+    position = bisect_left(keys, prefix)
+    while position < len(keys) and keys[position].startswith(prefix):
+        entry_id = ids[position]
+        position += 1
+        if entry_id in seen:
+            continue
+
+        seen.add(entry_id)
+        entry = entries[entry_id]
+        _code, _name, _image, is_bundle, entry_school, entry_class = entry
+        if (
+            (school and entry_school != school)
+            or (class_ and entry_class != class_)
+            or (item_type == "items" and is_bundle)
+            or (item_type == "bundles" and not is_bundle)
+        ):
+            continue
+
+        results.append(entry)
+        if len(results) >= limit:
+            break
+
+    return [
+        {
+            "item_code": item_code,
+            "item_name": item_name,
+            "image": image,
+            "type": "bundle" if is_bundle else "item",
+        }
+        for item_code, item_name, image, is_bundle, _school, _class in results
+    ]
+
+
+def get_prefix_index():
+    """Get this worker's prefix index, rebuilding it if the snapshot changed"""
+    version = get_snapshot_version()
+    prefix_index = _prefix_indexes.get(frappe.local.site)
+
+    if prefix_index is None or prefix_index["version"] != version:
+        prefix_index = build_prefix_index(get_snapshot(version))
+        # The version read before the snapshot: a bump during the build
+        # triggers another rebuild on the next lookup
+        prefix_index["version"] = version
+        _prefix_indexes[frappe.local.site] = prefix_index
+
+    return prefix_index
+
+
+def build_prefix_index(entries):
+    """Build parallel sorted key / entry-id arrays from snapshot entries"""
+    pairs = []
+    for entry_id, (item_code, item_name, barcode, *_rest) in enumerate(entries):
+        for key in get_prefix_keys(item_code, item_name, barcode):
+            pairs.append((key, entry_id))
+
+    pairs.sort()
+
+    return {
+        "version": None,
+        "keys": [key for key, _entry_id in pairs],
+        "ids": [entry_id for _key, entry_id in pairs],
+        # Barcodes are only needed as keys, drop them from the stored entries
+        "entries": [
+            (code, name, image, is_bundle, school, class_)
+            for code, name, _barcode, image, is_bundle, school, class_ in entries
+        ],
+    }
+
+
+def get_prefix_keys(item_code, item_name, barcode):
+    keys = {(item_code or "").lower(), (item_name or "").lower(), (barcode or "").lower()}
+    keys.update(re.findall(r"\w+", (item_name or "").lower()))
+    return [key for key in keys if key]
+
+
+def get_snapshot_version():
+    return frappe.cache().get_value(VERSION_KEY, generator=lambda: frappe.generate_hash(length=10))
+
+
+def get_snapshot(version):
+    """Get (item_code, item_name, barcode, image, is_bundle, school, class) tuples for all sellable items"""
+    entries = frappe.cache().get_value(SNAPSHOT_KEY)
+
+    if entries is None:
+        entries = [
+            tuple(row) for row in frappe.db.sql("""
+                SELECT
+                    idx.item_code, idx.item_name, idx.barcode, i.image, idx.is_bundle,
+                    idx.trustbit_school, idx.trustbit_class
+                FROM `tabTrustbit Search Index` idx
+                INNER JOIN `tabItem` i ON i.name = idx.item_code
+                WHERE idx.is_sales_item = 1 OR idx.is_bundle = 1
+            """)
+        ]
+        # An index change committed meanwhile may not be in these rows
+        if frappe.cache().get_value(VERSION_KEY) == version:
+            frappe.cache().set_value(SNAPSHOT_KEY, entries, expires_in_sec=SNAPSHOT_TTL)
+
+    return entries
+
+
+def clear_autocomplete_snapshot():
+    """Drop the shared snapshot once the current transaction commits"""
+    if frappe.flags.autocomplete_clear_queued:
+        return
+
+    frappe.flags.autocomplete_clear_queued = True
+    frappe.db.after_commit.add(drop_autocomplete_snapshot)
+    frappe.db.after_rollback.add(reset_autocomplete_clear)
+
+
+def reset_autocomplete_clear():
+    frappe.flags.autocomplete_clear_queued = False
+
+
+def drop_autocomplete_snapshot():
+    """Drop the shared snapshot so every worker rebuilds its prefix index"""
+    frappe.flags.autocomplete_clear_queued = False
+    frappe.cache().delete_value(SNAPSHOT_KEY)
+    frappe.cache().set_value(VERSION_KEY, frappe.generate_hash(length=10))
@@ -0,0 +1,301 @@
+# Copyright (c) 2024, Trustbit and contributors
+# For license information, please see license.txt
+
+"""Synthetic school catalog for benchmarks.
+
+Everything created here is named with the BENCH- prefix (groups with
+"Bench "), so the catalog can be dropped and rebuilt without touching real
+data. Rows are written with bulk inserts; building 25K items takes seconds,
+not the hours that inserting documents one by one would.
+
+Run on a local development site only.
+"""
+
+import random
+
+import frappe
+from frappe.utils import add_days, flt, now, today
+
+from trustbit_website_school.trustbit_website_school.doctype.trustbit_settings.trustbit_settings import (
+    get_default_warehouse, get_selling_price_list
+)
+
+PREFIX = "BENCH-"
+GROUP_PREFIX = "Bench "
+BENCH_USER = "bench-customer@example.com"
+BENCH_CUSTOMER = "Bench Customer"
+
+DEFAULT_SIZES = {
+    "items": 25000,
+    "item_groups": 40,
+    "bundles": 300,
+    "bundle_components": 8,
+    "sales_invoices": 5000,
+    "invoice_items": 4,
+    "sales_orders": 200,
+    "order_items": 6,
+}
+
+SCHOOLS = [
+    "St. Xavier's", "Delhi Public School", "Kendriya Vidyalaya", "Ryan International",
+    "DAV Public School", "Holy Cross", "Carmel Convent", "Army Public School",
+]
+CLASSES = [f"Class {n}" for n in range(1, 13)]
+PRODUCTS = [
+    "Notebook", "Long Book", "Drawing Book", "Geometry Box", "Pencil", "Gel Pen",
+    "Ball Pen", "Eraser", "Sharpener", "Scale", "Crayons", "Water Colours",
+    "Textbook", "Workbook", "Atlas", "Dictionary", "School Bag", "Lunch Box",
+    "Water Bottle", "Uniform Shirt", "Uniform Trousers", "Tie", "Belt", "Socks",
+]
+VARIANTS = ["A4", "A5", "200 Pages", "100 Pages", "Blue", "Black", "Red", "Small", "Medium", "Large"]
+
+# Child tables cleared together with their parents
+CHILD_TABLES = {
+    "Product Bundle": "Product Bundle Item",
+    "Sales Invoice": "Sales Invoice Item",
+    "Sales Order": "Sales Order Item",
+}
+
+
+def build_catalog(seed=42, **sizes):
+    """Drop and rebuild the benchmark catalog; returns the sizes used"""
+    sizes = {**DEFAULT_SIZES, **{k: int(v) for k, v in sizes.items() if v is not None}}
+    rng = random.Random(seed)
+
+    drop_catalog()
+
+    groups = make_item_groups(sizes["item_groups"])
+    items = make_items(rng, groups, sizes["items"])
+    bundles = make_bundles(rng, groups, items, sizes["bundles"], sizes["bundle_components"])
+    make_prices_and_stock(rng, items + bundles)
+    customer = make_customer()
+    make_sales_invoices(rng, customer, items, sizes["sales_invoices"], sizes["invoice_items"])
+    make_sales_orders(rng, customer, items + bundles, sizes["sales_orders"], sizes["order_items"])
+    frappe.db.commit()
+
+    refresh_derived_data()
+    return sizes
+
+
+def drop_catalog():
+    """Delete every benchmark row"""
+    for doctype in ("Item Price", "Bin", "Trustbit Item Sales", "Trustbit Search Index"):
+        frappe.db.sql(f"DELETE FROM `tab{doctype}` WHERE item_code LIKE %s", f"{PREFIX}%")
+
+    for parent, child in CHILD_TABLES.items():
+        frappe.db.sql(f"DELETE FROM `tab{child}` WHERE parent LIKE %s", f"{PREFIX}%")
+        frappe.db.sql(f"DELETE FROM `tab{parent}` WHERE name LIKE %s", f"{PREFIX}%")
+
+    frappe.db.sql("DELETE FROM `tabItem` WHERE name LIKE %s", f"{PREFIX}%")
+    for group in frappe.get_all("Item Group", filters={"name": ["like", f"{GROUP_PREFIX}%"]}, pluck="name"):
+        frappe.delete_doc("Item Group", group, force=True, ignore_permissions=True)
+
+    frappe.db.commit()
+
+
+def make_item_groups(count):
+    groups = []
+    for n in range(1, count + 1):
+        name = f"{GROUP_PREFIX}{PRODUCTS[(n - 1) % len(PRODUCTS)]} {n:02d}"
+        frappe.get_doc({
+            "doctype": "Item Group",
+            "item_group_name": name,
+            "parent_item_group": "All Item Groups",
+            "is_group": 0,
+        }).insert(ignore_permissions=True)
+        groups.append(name)
+
+    return groups
+
+
+def make_items(rng, groups, count):
+    items = []
+    rows = []
+    for n in range(1, count + 1):
+        code = f"{PREFIX}ITEM-{n:05d}"
+        school = rng.choice(SCHOOLS)
+        name = f"{rng.choice(PRODUCTS)} {rng.choice(VARIANTS)} {school}"
+        rows.append(get_item_row(code, name, rng.choice(groups), school, rng.choice(CLASSES), is_stock_item=1))
+        items.append(code)
+
+    bulk_insert("Item", rows)
+    return items
+
+
+def make_bundles(rng, groups, items, count, components):
+    bundles = []
+    item_rows = []
+    bundle_rows = []
+    component_rows = []
+    for n in range(1, count + 1):
+        code = f"{PREFIX}BUNDLE-{n:04d}"
+        school = rng.choice(SCHOOLS)
+        school_class = rng.choice(CLASSES)
+        item_rows.append(get_item_row(
+            code, f"{school} {school_class} Kit", rng.choice(groups), school, school_class, is_stock_item=0
+        ))
+        bundle_rows.append({"name": code, "new_item_code": code, "description": f"{school} {school_class} Kit"})
+        for idx, item_code in enumerate(rng.sample(items, components), start=1):
+            component_rows.append({
+                "name": f"{code}-{idx}", "parent": code, "parenttype": "Product Bundle",
+                "parentfield": "items", "idx": idx, "item_code": item_code, "qty": rng.randint(1, 4),
+            })
+        bundles.append(code)
+
+    bulk_insert("Item", item_rows)
+    bulk_insert("Product Bundle", bundle_rows)
+    bulk_insert("Product Bundle Item", component_rows)
+    return bundles
+
+
+def make_prices_and_stock(rng, item_codes):
+    price_list = get_selling_price_list()
+    warehouse = get_default_warehouse() or frappe.db.get_value("Warehouse", {"is_group": 0}, "name")
+    currency = frappe.db.get_value("Price List", price_list, "currency") or "INR"
+
+    bulk_insert("Item Price", [
+        {
+            "name": f"{PREFIX}PRICE-{n:05d}", "item_code": code, "price_list": price_list,
+            "selling": 1, "currency": currency, "price_list_rate": rng.randint(10, 2000),
+        }
+        for n, code in enumerate(item_codes, start=1)
+    ])
+
+    bins = []
+    for n, code in enumerate(item_codes, start=1):
+        qty = rng.choice([0, 5, 20, 100, 500])
+        bins.append({
+            "name": f"{PREFIX}BIN-{n:05d}", "item_code": code, "warehouse": warehouse,
+            "actual_qty": qty, "projected_qty": qty,
+        })
+
+    bulk_insert("Bin", bins)
+
+
+def make_customer():
+    """Website user with a Customer and Contact, used for orders and cart benchmarks"""
+    if not frappe.db.exists("User", BENCH_USER):
+        frappe.get_doc({
+            "doctype": "User",
+            "email": BENCH_USER,
+            "first_name": "Bench",
+            "user_type": "Website User",
+            "send_welcome_email": 0,
+            "roles": [{"role": "Customer"}],
+        }).insert(ignore_permissions=True)
+
+    if not frappe.db.exists("Customer", BENCH_CUSTOMER):
+        customer = frappe.get_doc({
+            "doctype": "Customer",
+            "customer_name": BENCH_CUSTOMER,
+            "customer_type": "Individual",
+        })
+        if customer.meta.has_field("user"):
+            customer.user = BENCH_USER
+        customer.insert(ignore_permissions=True)
+
+    if not frappe.db.exists("Contact", {"email_id": BENCH_USER}):
+        frappe.get_doc({
+            "doctype": "Contact",
+            "first_name": "Bench",
+            "user": BENCH_USER,
+            "email_ids": [{"email_id": BENCH_USER, "is_primary": 1}],
+            "links": [{"link_doctype": "Customer", "link_name": BENCH_CUSTOMER}],
+        }).insert(ignore_permissions=True)
+
+    return BENCH_CUSTOMER
+
+
+def make_sales_invoices(rng, customer, items, count, lines):
+    company = get_company()
+    invoices = []
+    invoice_items = []
+    for n in range(1, count + 1):
+        name = f"{PREFIX}SINV-{n:05d}"
+        posting_date = add_days(today(), -rng.randint(0, 90))
+        total = 0
+        for idx, item_code in enumerate(rng.sample(items, lines), start=1):
+            qty, rate = rng.randint(1, 10), rng.randint(10, 500)
+            total += qty * rate
+            invoice_items.append({
+                "name": f"{name}-{idx}", "parent": name, "parenttype": "Sales Invoice",
+                "parentfield": "items", "idx": idx, "item_code": item_code, "item_name": item_code,
+                "qty": qty, "rate": rate, "amount": qty * rate, "docstatus": 1,
+            })
+        invoices.append({
+            "name": name, "customer": customer, "company": company, "posting_date": posting_date,
+            "grand_total": flt(total), "docstatus": 1, "status": "Paid",
+        })
+
+    bulk_insert("Sales Invoice", invoices)
+    bulk_insert("Sales Invoice Item", invoice_items)
+
+
+def make_sales_orders(rng, customer, items, count, lines):
+    company = get_company()
+    orders = []
+    order_items = []
+    for n in range(1, count + 1):
+        name = f"{PREFIX}SO-{n:05d}"
+        total = 0
+        for idx, item_code in enumerate(rng.sample(items, lines), start=1):
+            qty, rate = rng.randint(1, 5), rng.randint(10, 2000)
+            total += qty * rate
+            order_items.append({
+                "name": f"{name}-{idx}", "parent": name, "parenttype": "Sales Order",
+                "parentfield": "items", "idx": idx, "item_code": item_code, "item_name": item_code,
+                "qty": qty, "rate": rate, "amount": qty * rate, "docstatus": 1,
+            })
+        orders.append({
+            "name": name, "customer": customer, "company": company,
+            "transaction_date": add_days(today(), -rng.randint(0, 365)),
+            "status": rng.choice(["To Deliver and Bill", "To Bill", "Completed"]),
+            "delivery_status": rng.choice(["Not Delivered", "Fully Delivered"]),
+            "grand_total": flt(total), "docstatus": 1,
+        })
+
+    bulk_insert("Sales Order", orders)
+    bulk_insert("Sales Order Item", order_items)
+
+
+def refresh_derived_data():
+    """Rebuild the search index and sales rollup and drop stale caches"""
+    from trustbit_website_school.api.webshop import TRENDING_CACHE_KEY, clear_category_cache
+    from trustbit_website_school.page_cache import invalidate_cache_tags
+    from trustbit_website_school.trustbit_website_school.doctype.trustbit_item_sales.trustbit_item_sales import rebuild_item_sales
+    from trustbit_website_school.trustbit_website_school.doctype.trustbit_search_index.trustbit_search_index import rebuild_search_index
+
+    rebuild_search_index()
+    rebuild_item_sales(add_days(today(), -400))
+    frappe.db.commit()
+
+    clear_category_cache()
+    frappe.cache().delete_keys(TRENDING_CACHE_KEY)
+    invalidate_cache_tags("items", "bundles", "categories", "orders")
+
+
+def get_item_row(code, name, group, school, school_class, is_stock_item):
+    return {
+        "name": code, "item_code": code, "item_name": name, "item_group": group,
+        "stock_uom": "Nos", "is_stock_item": is_stock_item, "is_sales_item": 1,
+        "include_item_in_manufacturing": 0, "description": name,
+        "trustbit_school": school, "trustbit_class": school_class,
+    }
+
+
+def get_company():
+    return frappe.defaults.get_global_default("company") or frappe.db.get_value("Company", {}, "name")
+
+
+def bulk_insert(doctype, rows):
+    """Insert plain dict rows with standard columns filled in"""
+    if not rows:
+        return
+
+    timestamp = now()
+    fields = ["creation", "modified", "owner", "modified_by"] + list(rows[0])
+    values = [
+        (timestamp, timestamp, "Administrator", "Administrator", *row.values())
+        for row in rows
+    ]
+    frappe.db.bulk_insert(doctype, fields, values)
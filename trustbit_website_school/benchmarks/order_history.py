@@ -0,0 +1,50 @@
+# Copyright (c) 2024, Trustbit and contributors
+# For license information, please see license.txt
+
+"""Query-count benchmark for the order history API.
+
+The number of SQL queries should not depend on the page size:
+
+    bench --site <site> execute trustbit_website_school.benchmarks.order_history.run --kwargs "{'user': 'parent@example.com'}"
+"""
+
+import time
+
+import frappe
+
+from trustbit_website_school.api.webshop import get_order_history
+from trustbit_website_school.profiling import QueryCounter
+
+PAGE_SIZES = (5, 10, 20, 50)
+
+
+def run(user, page_sizes=PAGE_SIZES):
+    """Call get_order_history as `user` for each page size and report query counts"""
+    previous_user = frappe.session.user
+    frappe.set_user(user)
+    results = []
+
+    try:
+        for limit in page_sizes:
+            start = time.perf_counter()
+            with QueryCounter() as counter:
+                response = get_order_history(limit=limit, with_total=0)
+
+            results.append({
+                "limit": limit,
+                "orders": len(response.get("orders") or []),
+                "queries": counter.count,
+                "sql_ms": round(counter.time * 1000, 2),
+                "total_ms": round((time.perf_counter() - start) * 1000, 2),
+            })
+    finally:
+        # Hand the caller (bench console, execute) back its own session
+        frappe.set_user(previous_user)
+
+    for row in results:
+        print("limit={limit:<4} orders={orders:<4} queries={queries:<4} sql={sql_ms}ms total={total_ms}ms".format(**row))
+
+    flat = len({row["queries"] for row in results}) == 1
+    print("query count is flat" if flat else "query count grows with page size")
+
+    return {"flat": flat, "results": results}
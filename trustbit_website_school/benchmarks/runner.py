@@ -0,0 +1,161 @@
+# Copyright (c) 2024, Trustbit and contributors
+# For license information, please see license.txt
+
+"""Benchmark runner for the webshop APIs.
+
+Drives the main storefront APIs against the synthetic catalog and reports
+latency percentiles and SQL query counts per scenario. Results are saved as
+JSON under sites/<site>/benchmarks/ so runs can be compared:
+
+    bench --site <site> trustbit-benchmark --build-catalog
+    bench --site <site> trustbit-benchmark --iterations 50 --compare sites/<site>/benchmarks/<previous>.json
+"""
+
+import json
+import os
+import platform
+import time
+
+import frappe
+from frappe.utils import now
+
+from trustbit_website_school.benchmarks.catalog import BENCH_USER, PREFIX
+from trustbit_website_school.profiling import QueryCounter, percentile
+
+SEARCH_QUERIES = ["notebook", "gel pen a4", "geometry", "BENCH-ITEM-0123", "class 7", "xavier", "lunch box"]
+
+
+def get_scenarios():
+    """Scenario name -> (user to run as, callable taking the iteration number)"""
+    from trustbit_website_school.api import webshop
+
+    bundles = frappe.get_all(
+        "Product Bundle", filters={"name": ["like", f"{PREFIX}%"]}, pluck="new_item_code", limit=20
+    ) or [None]
+
+    return {
+        "search_items": (
+            "Guest", lambda n: webshop.search_items(SEARCH_QUERIES[n % len(SEARCH_QUERIES)], limit=20)
+        ),
+        "get_categories": ("Guest", lambda n: webshop.get_categories()),
+        "get_bundles": ("Guest", lambda n: webshop.get_bundles(limit=20, page=1 + n % 3)),
+        "get_homepage_data": ("Guest", lambda n: webshop.get_homepage_data()),
+        "get_order_history": (BENCH_USER, lambda n: webshop.get_order_history(limit=20)),
+        "add_bundle_to_cart": (
+            BENCH_USER, lambda n: webshop.add_bundle_to_cart(bundles[n % len(bundles)], qty=1)
+        ),
+    }
+
+
+def run_benchmarks(iterations=30, scenarios=None, output=None, compare=None, log=print):
+    """Run each scenario `iterations` times and save the results as JSON"""
+    selected = get_scenarios()
+    if scenarios:
+        selected = {name: selected[name] for name in scenarios}
+
+    results = {}
+    for name, (user, call) in selected.items():
+        results[name] = run_scenario(user, call, iterations)
+        log(format_result(name, results[name]))
+
+    report = {
+        "timestamp": now(),
+        "site": frappe.local.site,
+        "iterations": iterations,
+        "catalog": get_catalog_sizes(),
+        "environment": {
+            "python": platform.python_version(),
+            "db": frappe.db.sql("SELECT VERSION()")[0][0],
+        },
+        "results": results,
+    }
+
+    output = output or get_default_output_path()
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2, default=str)
+    log(f"Saved results to {output}")
+
+    if compare:
+        with open(compare) as f:
+            for line in compare_results(json.load(f)["results"], results):
+                log(line)
+
+    return report
+
+
+def run_scenario(user, call, iterations):
+    """First (cold) call, then `iterations` timed calls"""
+    frappe.set_user(user)
+    try:
+        cold_ms, cold_queries = timed_call(call, 0)
+
+        durations = []
+        queries = []
+        for n in range(1, iterations + 1):
+            elapsed, count = timed_call(call, n)
+            durations.append(elapsed)
+            queries.append(count)
+    finally:
+        frappe.set_user("Administrator")
+
+    durations.sort()
+    return {
+        "cold_ms": cold_ms,
+        "cold_queries": cold_queries,
+        "p50_ms": percentile(durations, 0.50),
+        "p95_ms": percentile(durations, 0.95),
+        "p99_ms": percentile(durations, 0.99),
+        "max_ms": round(durations[-1], 1),
+        "mean_ms": round(sum(durations) / len(durations), 1),
+        "avg_queries": round(sum(queries) / len(queries), 1),
+        "max_queries": max(queries),
+    }
+
+
+def timed_call(call, n):
+    start = time.perf_counter()
+    with QueryCounter() as counter:
+        call(n)
+    return round((time.perf_counter() - start) * 1000, 1), counter.count
+
+
+def compare_results(previous, current):
+    """Lines describing p50/p95/query changes against a previous run"""
+    lines = []
+    for name, result in current.items():
+        before = previous.get(name)
+        if not before:
+            continue
+
+        changes = []
+        for metric in ("p50_ms", "p95_ms", "avg_queries"):
+            if before.get(metric):
+                change = (result[metric] - before[metric]) / before[metric] * 100
+                changes.append(f"{metric} {before[metric]} -> {result[metric]} ({change:+.0f}%)")
+        lines.append(f"{name:<20} " + ", ".join(changes))
+
+    return lines
+
+
+def format_result(name, result):
+    return (
+        f"{name:<20} p50 {result['p50_ms']:>8}ms  p95 {result['p95_ms']:>8}ms  "
+        f"p99 {result['p99_ms']:>8}ms  queries {result['avg_queries']:>6}  "
+        f"(cold {result['cold_ms']}ms / {result['cold_queries']} queries)"
+    )
+
+
+def get_catalog_sizes():
+    like = f"{PREFIX}%"
+    return {
+        "items": frappe.db.count("Item", {"name": ["like", like]}),
+        "bundles": frappe.db.count("Product Bundle", {"name": ["like", like]}),
+        "sales_invoices": frappe.db.count("Sales Invoice", {"name": ["like", like]}),
+        "sales_orders": frappe.db.count("Sales Order", {"name": ["like", like]}),
+    }
+
+
+def get_default_output_path():
+    timestamp = now().replace(" ", "_").replace(":", "-").split(".")[0]
+    return frappe.get_site_path("benchmarks", f"webshop_{timestamp}.json")
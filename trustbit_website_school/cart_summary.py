@@ -0,0 +1,92 @@
+# Copyright (c) 2024, Trustbit and contributors
+# For license information, please see license.txt
+
+"""Cart summary (item count and total) for the header badge.
+
+The summary of each user's shopping cart Quotation is kept in Redis and
+rewritten from Quotation events, so the badge on every page is one cache
+read instead of loading the full Quotation with taxes. The summary is kept
+per user rather than per browser session: webshop has one cart per user,
+so all of a user's sessions show the same count. The TTL is a safety net
+for carts changed without doc_events.
+"""
+
+import frappe
+from frappe.utils import flt
+
+CART_SUMMARY_KEY = "trustbit_cart_summary"
+CART_SUMMARY_TTL = 24 * 60 * 60
+
+EMPTY_SUMMARY = {"count": 0, "lines": 0, "total": 0, "currency": None}
+
+
+def get_cached_cart_summary(user):
+    """Get the cart summary of a user, building it on a cache miss"""
+    if not user or user == "Guest":
+        return dict(EMPTY_SUMMARY)
+
+    cache_key = get_cart_summary_key(user)
+    summary = frappe.cache().get_value(cache_key)
+
+    if summary is None:
+        summary = build_cart_summary(user)
+        frappe.cache().set_value(cache_key, summary, expires_in_sec=CART_SUMMARY_TTL)
+
+    return summary
+
+
+def get_cart_summary_key(user):
+    return f"{CART_SUMMARY_KEY}::{user}"
+
+
+def build_cart_summary(user):
+    """Summarize the user's latest draft cart with one aggregate query"""
+    # Same lookup as webshop's _get_cart_quotation, without resolving (or creating) the party
+    cart = frappe.db.sql("""
+        SELECT
+            q.grand_total, q.currency,
+            COUNT(qi.name) as line_count,
+            COALESCE(SUM(qi.qty), 0) as qty
+        FROM `tabQuotation` q
+        LEFT JOIN `tabQuotation Item` qi
+            ON qi.parent = q.name AND qi.parenttype = 'Quotation'
+        WHERE q.contact_email = %(user)s
+            AND q.order_type = 'Shopping Cart'
+            AND q.docstatus = 0
+        GROUP BY q.name
+        ORDER BY q.modified DESC
+        LIMIT 1
+    """, {"user": user}, as_dict=True)
+
+    if not cart:
+        return dict(EMPTY_SUMMARY)
+
+    return {
+        "count": flt(cart[0].qty),
+        "lines": cart[0].line_count,
+        "total": flt(cart[0].grand_total),
+        "currency": cart[0].currency,
+    }
+
+
+def get_summary_from_quotation(quotation):
+    return {
+        "count": sum(flt(item.qty) for item in quotation.items),
+        "lines": len(quotation.items),
+        "total": flt(quotation.grand_total),
+        "currency": quotation.currency,
+    }
+
+
+def update_cart_summary(doc, method=None):
+    """Quotation doc_event: rewrite (or drop) the owner's cart summary"""
+    if doc.order_type != "Shopping Cart" or not doc.contact_email:
+        return
+
+    cache_key = get_cart_summary_key(doc.contact_email)
+    if method == "on_trash" or doc.docstatus != 0:
+        # Ordered or deleted: the next read finds the current cart, if any
+        frappe.cache().delete_value(cache_key)
+        return
+
+    frappe.cache().set_value(cache_key, get_summary_from_quotation(doc), expires_in_sec=CART_SUMMARY_TTL)
@@ -0,0 +1,142 @@
+# Copyright (c) 2024, Trustbit and contributors
+# For license information, please see license.txt
+
+import sys
+
+import click
+from frappe.commands import get_site, pass_context
+
+
+@click.command("trustbit-rebuild-search-index")
+@pass_context
+def rebuild_search_index(context):
+    """Rebuild the Trustbit webshop search index"""
+    import frappe
+    from trustbit_website_school.trustbit_website_school.doctype.trustbit_search_index.trustbit_search_index import rebuild_search_index as rebuild
+
+    site = get_site(context)
+    frappe.init(site=site)
+    frappe.connect()
+    try:
+        total = rebuild()
+        click.echo(f"Indexed {total} items")
+    finally:
+        frappe.destroy()
+
+
+@click.command("trustbit-warm-cache")
+@click.option("--rate", default=2.0, type=float, help="Pages requested per second")
+@click.option("--max-seconds", default=0, type=int, help="Stop after this many seconds (0 = no limit)")
+@pass_context
+def warm_cache(context, rate, max_seconds):
+    """Pre-warm the Trustbit storefront caches"""
+    import frappe
+    from trustbit_website_school.warmup import warm_caches
+
+    site = get_site(context)
+    frappe.init(site=site)
+    frappe.connect()
+    try:
+        report = warm_caches(requests_per_second=rate, max_seconds=max_seconds, log=click.echo)
+        click.echo(
+            f"Warmed {report['pages']} pages in {report['total_seconds']}s "
+            f"(p50 {report['p50_ms']}ms, p95 {report['p95_ms']}ms, {len(report['failed'])} failed)"
+        )
+    finally:
+        frappe.destroy()
+
+
+@click.command("trustbit-benchmark")
+@click.option("--build-catalog", is_flag=True, help="Drop and rebuild the synthetic BENCH- catalog first")
+@click.option("--items", type=int, help="Catalog items (default 25000)")
+@click.option("--bundles", type=int, help="Product bundles (default 300)")
+@click.option("--bundle-components", type=int, help="Components per bundle (default 8)")
+@click.option("--sales-invoices", type=int, help="Submitted sales invoices (default 5000)")
+@click.option("--sales-orders", type=int, help="Sales orders of the benchmark customer (default 200)")
+@click.option("--iterations", default=30, type=int, help="Timed calls per scenario")
+@click.option("--scenario", "scenarios", multiple=True, help="Only run these scenarios")
+@click.option("--output", help="Result JSON path (default sites/<site>/benchmarks/)")
+@click.option("--compare", help="Previous result JSON to compare against")
+@pass_context
+def benchmark(context, build_catalog, items, bundles, bundle_components, sales_invoices,
+        sales_orders, iterations, scenarios, output, compare):
+    """Benchmark the Trustbit webshop APIs on a synthetic catalog"""
+    import frappe
+    from trustbit_website_school.benchmarks.catalog import build_catalog as build
+    from trustbit_website_school.benchmarks.runner import run_benchmarks
+
+    site = get_site(context)
+    frappe.init(site=site)
+    frappe.connect()
+    try:
+        if build_catalog:
+            sizes = build(
+                items=items, bundles=bundles, bundle_components=bundle_components,
+                sales_invoices=sales_invoices, sales_orders=sales_orders
+            )
+            click.echo(f"Built benchmark catalog: {sizes}")
+
+        run_benchmarks(
+            iterations=iterations, scenarios=scenarios, output=output, compare=compare, log=click.echo
+        )
+    finally:
+        frappe.destroy()
+
+
+@click.command("trustbit-verify-indexes")
+@click.option("--create", is_flag=True, help="Create missing indexes before checking")
+@click.option("--strict", is_flag=True, help="Fail on any full table scan, however small")
+@pass_context
+def verify_indexes(context, create, strict):
+    """Check the webshop query indexes with EXPLAIN"""
+    import frappe
+    from trustbit_website_school.indexes import ensure_indexes, verify_indexes as verify
+
+    site = get_site(context)
+    frappe.init(site=site)
+    frappe.connect()
+    try:
+        if create:
+            for index_name in ensure_indexes():
+                click.echo(f"Created {index_name}")
+
+        ok, lines = verify(strict=strict)
+        for line in lines:
+            click.echo(line)
+    finally:
+        frappe.destroy()
+
+    if not ok:
+        click.echo("Index verification failed")
+        sys.exit(1)
+
+
+@click.command("trustbit-verify-api")
+@pass_context
+def verify_api(context):
+    """Check that request arguments reach the Trustbit whitelisted APIs"""
+    import frappe
+    from trustbit_website_school.profiling import verify_api_arguments
+
+    site = get_site(context)
+    frappe.init(site=site)
+    frappe.connect()
+    try:
+        ok, lines = verify_api_arguments()
+        for line in lines:
+            click.echo(line)
+    finally:
+        frappe.destroy()
+
+    if not ok:
+        click.echo("API argument verification failed")
+        sys.exit(1)
+
+
+commands = [
+    rebuild_search_index,
+    warm_cache,
+    benchmark,
+    verify_indexes,
+    verify_api,
+]
@@ -0,0 +1,212 @@
+# Copyright (c) 2024, Trustbit and contributors
+# For license information, please see license.txt
+
+"""Queued contact form submissions.
+
+The contact form endpoint only validates and pushes the submission onto a
+Redis list, so the guest request returns without touching the database or
+the mail queue. A background job drains the list and inserts the
+Communications in batches (one commit per batch). A submission that fails to
+insert is rolled back on its own, logged and moved to a dead-letter list, so
+it cannot hold up the queue; requeue_failed_submissions puts those back once
+the cause is fixed. A scheduled digest then sends the store one email
+listing every submission since the last one.
+
+Repeated submissions of the same message by a sender are dropped, and each
+sender is capped per hour, so a flood cannot build up a backlog.
+"""
+
+import hashlib
+import json
+
+import frappe
+from frappe.utils import escape_html, now
+
+QUEUE_KEY = "trustbit_contact_queue"
+DIGEST_KEY = "trustbit_contact_digest"
+FAILED_KEY = "trustbit_contact_failed"
+JOB_FLAG_KEY = "trustbit_contact_job"
+DEDUPE_KEY = "trustbit_contact_dedupe"
+SENDER_COUNT_KEY = "trustbit_contact_sender"
+
+BATCH_SIZE = 50
+# Identical messages from one sender within this window are dropped
+DEDUPE_SECONDS = 60 * 60
+MAX_PER_SENDER_PER_HOUR = 5
+# A scheduled job flag older than this is assumed lost and re-enqueued
+JOB_FLAG_TTL = 5 * 60
+
+
+def queue_contact_submission(name, email, phone, message, subject):
+    """Queue a submission; returns False if it was dropped as a duplicate or flood"""
+    cache = frappe.cache()
+    sender = email.strip().lower()
+    message_hash = hashlib.sha1(f"{sender}\n{subject}\n{message}".encode()).hexdigest()
+    sender_key = cache.make_key(f"{SENDER_COUNT_KEY}::{sender}")
+
+    pipe = cache.pipeline()
+    pipe.set(cache.make_key(f"{DEDUPE_KEY}::{message_hash}"), 1, nx=True, ex=DEDUPE_SECONDS)
+    pipe.incr(sender_key)
+    is_new, sender_count = pipe.execute()
+
+    if sender_count == 1:
+        pipe.expire(sender_key, 60 * 60)
+        pipe.execute()
+
+    if not is_new or sender_count > MAX_PER_SENDER_PER_HOUR:
+        return False
+
+    submission = {
+        "name": name, "email": email, "phone": phone, "message": message,
+        "subject": subject, "received_on": now(),
+    }
+    pipe.rpush(cache.make_key(QUEUE_KEY), json.dumps(submission))
+    pipe.set(cache.make_key(JOB_FLAG_KEY), 1, nx=True, ex=JOB_FLAG_TTL)
+    _length, needs_job = pipe.execute()
+
+    # One pending job drains everything queued meanwhile
+    if needs_job:
+        frappe.enqueue(
+            "trustbit_website_school.contact_queue.process_contact_queue",
+            queue="short",
+            enqueue_after_commit=True
+        )
+
+    return True
+
+
+def process_contact_queue():
+    """Background job: insert queued submissions as Communications, batch by batch"""
+    cache = frappe.cache()
+    cache.delete_value(JOB_FLAG_KEY)
+    queue_key = cache.make_key(QUEUE_KEY)
+
+    while True:
+        pipe = cache.pipeline()
+        pipe.lrange(queue_key, 0, BATCH_SIZE - 1)
+        pipe.ltrim(queue_key, BATCH_SIZE, -1)
+        batch, _trimmed = pipe.execute()
+        if not batch:
+            break
+
+        inserted, failed = insert_batch(batch)
+        try:
+            frappe.db.commit()
+        except Exception:
+            # The database itself failed: put the batch back in front so
+            # nothing is lost; the digest run retries it
+            frappe.db.rollback()
+            pipe.lpush(queue_key, *reversed(batch))
+            pipe.set(cache.make_key(JOB_FLAG_KEY), 1, ex=JOB_FLAG_TTL)
+            pipe.execute()
+            raise
+
+        if inserted:
+            pipe.rpush(cache.make_key(DIGEST_KEY), *[
+                json.dumps({"communication": name, **json.loads(raw)})
+                for name, raw in inserted
+            ])
+        if failed:
+            pipe.rpush(cache.make_key(FAILED_KEY), *failed)
+        pipe.execute()
+
+
+def insert_batch(batch):
+    """Insert each submission under its own savepoint; returns ([(name, raw)], [raw])"""
+    inserted, failed = [], []
+    for raw in batch:
+        frappe.db.savepoint("contact_submission")
+        try:
+            inserted.append((insert_communication(json.loads(raw)), raw))
+        except Exception:
+            frappe.db.rollback(save_point="contact_submission")
+            frappe.log_error(title="Contact form submission failed", message=raw)
+            failed.append(raw)
+
+    return inserted, failed
+
+
+def requeue_failed_submissions():
+    """Move dead-lettered submissions back onto the queue, e.g. after a fix:
+
+        bench --site <site> execute trustbit_website_school.contact_queue.requeue_failed_submissions
+    """
+    cache = frappe.cache()
+    failed_key = cache.make_key(FAILED_KEY)
+    pipe = cache.pipeline()
+    pipe.lrange(failed_key, 0, -1)
+    pipe.delete(failed_key)
+    failed, _deleted = pipe.execute()
+
+    if failed:
+        pipe.rpush(cache.make_key(QUEUE_KEY), *failed)
+        pipe.execute()
+        process_contact_queue()
+
+    return len(failed)
+
+
+def insert_communication(submission):
+    doc = frappe.get_doc({
+        "doctype": "Communication",
+        "communication_type": "Communication",
+        "communication_medium": "Email",
+        "subject": f"[Website] {submission['subject']}",
+        "content": get_submission_html(submission),
+        "sender": submission["email"],
+        "sent_or_received": "Received",
+        "communication_date": submission["received_on"],
+    })
+    doc.insert(ignore_permissions=True)
+    return doc.name
+
+
+def send_contact_digest():
+    """Scheduled: email the store one digest of all submissions since the last run"""
+    from trustbit_website_school.trustbit_website_school.doctype.trustbit_settings.trustbit_settings import get_trustbit_settings
+
+    # Drain anything a failed or lost job left behind first
+    process_contact_queue()
+
+    cache = frappe.cache()
+    digest_key = cache.make_key(DIGEST_KEY)
+    # Raw pipeline commands: RedisWrapper's list helpers prefix keys themselves
+    pipe = cache.pipeline()
+    pipe.lrange(digest_key, 0, -1)
+    (entries,) = pipe.execute()
+    if not entries:
+        return
+
+    settings = get_trustbit_settings()
+    if settings.email:
+        send_digest([json.loads(entry) for entry in entries], settings.email)
+        frappe.db.commit()
+
+    # Only drop what was sent: a failed send leaves the digest for the next run,
+    # and submissions queued meanwhile stay for the next digest
+    pipe.ltrim(digest_key, len(entries), -1)
+    pipe.execute()
+
+
+def send_digest(submissions, recipient):
+    frappe.sendmail(
+        recipients=[recipient],
+        subject=f"[Website] {len(submissions)} new contact form submission(s)",
+        message="<h3>New contact form submissions</h3>" + "<hr>".join(
+            f"<p><strong>Subject:</strong> {escape_html(s['subject'])}"
+            f" <small>({s['received_on']}, {s['communication']})</small></p>"
+            + get_submission_html(s)
+            for s in submissions
+        )
+    )
+
+
+def get_submission_html(submission):
+    return f"""
+        <p><strong>Name:</strong> {escape_html(submission['name'])}</p>
+        <p><strong>Email:</strong> {escape_html(submission['email'])}</p>
+        <p><strong>Phone:</strong> {escape_html(submission['phone'] or '')}</p>
+        <hr>
+        <p><strong>Message:</strong></p>
+        <p>{escape_html(submission['message'])}</p>
+    """
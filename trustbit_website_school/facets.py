@@ -0,0 +1,175 @@
+# Copyright (c) 2024, Trustbit and contributors
+# For license information, please see license.txt
+
+"""Precomputed facet counts for school / class / category browsing.
+
+For each scope ("items": sellable items, "bundles": product bundles) a Redis
+hash holds the number of indexed items per (school, class, category)
+combination. It is built with one GROUP BY over the Trustbit Search Index
+and then kept current with HINCRBY whenever an index row change commits. Facet
+counts under any filter, and filtered totals, are summed from the hash in
+Python without touching the database.
+"""
+
+from functools import partial
+
+import frappe
+from frappe.utils import cint
+
+FACETS_KEY = "trustbit_facets"
+# Rebuilt at least daily so any drift from missed events heals itself
+FACETS_TTL = 24 * 60 * 60
+SEPARATOR = "\x1f"
+
+# Move one count between fields of a facet hash, only if the hash exists.
+# Checking and incrementing in one script keeps a hash that expires in
+# between from being recreated partially and without a TTL.
+MOVE_COUNT_SCRIPT = """
+if redis.call("EXISTS", KEYS[1]) == 0 then
+    return 0
+end
+if ARGV[1] ~= "" then
+    redis.call("HINCRBY", KEYS[1], ARGV[1], -1)
+end
+if ARGV[2] ~= "" then
+    redis.call("HINCRBY", KEYS[1], ARGV[2], 1)
+end
+return 1
+"""
+
+# Facet dimension -> Trustbit Search Index column
+DIMENSIONS = {
+    "school": "trustbit_school",
+    "class": "trustbit_class",
+    "category": "item_group",
+}
+
+# Scope -> flag column of the index row
+SCOPES = {
+    "items": "is_sales_item",
+    "bundles": "is_bundle",
+}
+
+
+def get_facet_counts(scope="bundles", filters=None):
+    """Count per value of each dimension, applying the filters on the other dimensions"""
+    filters = {k: v for k, v in (filters or {}).items() if k in DIMENSIONS and v}
+    combinations = get_facet_combinations(scope)
+
+    facets = {}
+    for position, dimension in enumerate(DIMENSIONS):
+        other_filters = {k: v for k, v in filters.items() if k != dimension}
+        counts = {}
+        for combination, count in matching(combinations, other_filters):
+            value = combination[position]
+            if value:
+                counts[value] = counts.get(value, 0) + count
+
+        facets[dimension] = [
+            {"value": value, "count": count, "selected": filters.get(dimension) == value}
+            for value, count in sorted(counts.items())
+            if count > 0
+        ]
+
+    return facets
+
+
+def get_facet_total(scope="bundles", filters=None):
+    """Number of items in the scope matching all filters"""
+    filters = {k: v for k, v in (filters or {}).items() if k in DIMENSIONS and v}
+    return sum(count for _combination, count in matching(get_facet_combinations(scope), filters))
+
+
+def matching(combinations, filters):
+    positions = [(list(DIMENSIONS).index(k), v) for k, v in filters.items()]
+    for combination, count in combinations.items():
+        if all(combination[position] == value for position, value in positions):
+            yield combination, count
+
+
+def get_facet_combinations(scope):
+    """{(school, class, category): count} for a scope, built on first use"""
+    cache = frappe.cache()
+    key = get_facets_key(scope)
+    # Raw pipeline commands: RedisWrapper's own hash helpers pickle values
+    pipe = cache.pipeline()
+    pipe.hgetall(key)
+    (counts,) = pipe.execute()
+
+    if not counts:
+        counts = build_facet_combinations(scope)
+        pipe = cache.pipeline()
+        pipe.delete(key)
+        # Placeholder so an empty catalog is still a built hash
+        pipe.hset(key, mapping={"": 0, **counts})
+        pipe.expire(key, FACETS_TTL)
+        pipe.execute()
+
+    return {
+        tuple(as_text(field).split(SEPARATOR)): cint(count)
+        for field, count in counts.items()
+        if as_text(field)
+    }
+
+
+def build_facet_combinations(scope):
+    columns = ", ".join(f"IFNULL({column}, '')" for column in DIMENSIONS.values())
+    rows = frappe.db.sql(f"""
+        SELECT {columns}, COUNT(*)
+        FROM `tabTrustbit Search Index`
+        WHERE {SCOPES[scope]} = 1
+        GROUP BY {columns}
+    """)
+
+    return {SEPARATOR.join(row[:-1]): row[-1] for row in rows}
+
+
+def update_facet_counts(old_row=None, new_row=None):
+    """Move one index row between combinations; called on every index change
+
+    The hashes are only touched once the transaction commits, so a rolled
+    back save leaves the counts as they were.
+    """
+    changes = {}
+    for scope, flag in SCOPES.items():
+        old_field = get_field(old_row) if old_row and cint(old_row.get(flag)) else None
+        new_field = get_field(new_row) if new_row and cint(new_row.get(flag)) else None
+        if old_field != new_field:
+            changes[get_facets_key(scope)] = (old_field, new_field)
+
+    if not changes:
+        return
+
+    frappe.db.after_commit.add(partial(apply_facet_changes, changes))
+
+
+def apply_facet_changes(changes):
+    """Apply {facets key: (old field, new field)} moves to the built hashes"""
+    cache = frappe.cache()
+    move_count = cache.register_script(MOVE_COUNT_SCRIPT)
+    pipe = cache.pipeline()
+    for key, (old_field, new_field) in changes.items():
+        # Not built yet (or expired): the script skips it and the next read
+        # builds it from the index
+        move_count(keys=[key], args=[old_field or "", new_field or ""], client=pipe)
+
+    pipe.execute()
+
+
+def get_field(row):
+    return SEPARATOR.join(row.get(column) or "" for column in DIMENSIONS.values())
+
+
+def clear_facet_counts():
+    """Drop all facet hashes, e.g. after a full index rebuild"""
+    pipe = frappe.cache().pipeline()
+    pipe.delete(*[get_facets_key(scope) for scope in SCOPES])
+    pipe.execute()
+
+
+def get_facets_key(scope):
+    return frappe.cache().make_key(f"{FACETS_KEY}::{scope}")
+
+
+def as_text(value):
+    return value.decode() if isinstance(value, bytes) else value
@@ -9,18 +9,147 @@ required_apps = ["frappe", "erpnext", "webshop"]
 # Includes in <head>
 # ------------------
 
-app_include_css = "/assets/trustbit_website_school/css/trustbit_webshop.css"
-app_include_js = "/assets/trustbit_website_school/js/trustbit_webshop.js"
+# No app_include_* / web_include_*: Desk and non-shop pages load nothing from
+# this app. Shop pages pull their own bundles in trustbit_base.html
 
-# Website includes
-web_include_css = "/assets/trustbit_website_school/css/trustbit_webshop.css"
-web_include_js = "/assets/trustbit_website_school/js/trustbit_webshop.js"
+# Website Page Renderers
+# ----------------------
+
+# Cached guest pages first; every other shop page is only timed
+page_renderer = [
+    "trustbit_website_school.page_cache.GuestPageCache",
+    "trustbit_website_school.page_cache.StorefrontPage",
+]
+
+clear_cache = "trustbit_website_school.page_cache.clear_page_cache"
+
+# Jinja
+# -----
+
+jinja = {
+    "methods": ["trustbit_website_school.assets.inline_bundle"],
+}
 
 # Installation
 # ------------
 
 after_install = "trustbit_website_school.install.after_install"
 
+# Document Events
+# ---------------
+
+doc_events = {
+    "Item": {
+        "on_update": [
+            "trustbit_website_school.api.webshop.update_category_counts",
+            "trustbit_website_school.trustbit_website_school.doctype.trustbit_search_index.trustbit_search_index.update_item_index",
+            "trustbit_website_school.api.webshop.clear_bundle_cache_for_component",
+            "trustbit_website_school.page_cache.invalidate_doc_tags",
+            "trustbit_website_school.images.queue_image_variants",
+        ],
+        "on_trash": [
+            "trustbit_website_school.api.webshop.update_category_counts",
+            "trustbit_website_school.trustbit_website_school.doctype.trustbit_search_index.trustbit_search_index.update_item_index",
+            "trustbit_website_school.page_cache.invalidate_doc_tags",
+        ],
+        "after_rename": "trustbit_website_school.trustbit_website_school.doctype.trustbit_search_index.trustbit_search_index.rename_item_index",
+    },
+    "Product Bundle": {
+        "on_update": [
+            "trustbit_website_school.trustbit_website_school.doctype.trustbit_search_index.trustbit_search_index.update_bundle_index",
+            "trustbit_website_school.api.webshop.clear_bundle_cache",
+            "trustbit_website_school.page_cache.invalidate_doc_tags",
+        ],
+        "on_trash": [
+            "trustbit_website_school.trustbit_website_school.doctype.trustbit_search_index.trustbit_search_index.update_bundle_index",
+            "trustbit_website_school.api.webshop.clear_bundle_cache",
+            "trustbit_website_school.page_cache.invalidate_doc_tags",
+        ],
+    },
+    "Item Price": {
+        "on_update": [
+            "trustbit_website_school.api.webshop.clear_bundle_cache_for_component",
+            "trustbit_website_school.page_cache.invalidate_doc_tags",
+        ],
+        "on_trash": [
+            "trustbit_website_school.api.webshop.clear_bundle_cache_for_component",
+            "trustbit_website_school.page_cache.invalidate_doc_tags",
+        ],
+    },
+    "Bin": {
+        "on_update": "trustbit_website_school.api.webshop.clear_bundle_cache_for_component",
+    },
+    "Stock Ledger Entry": {
+        "on_submit": "trustbit_website_school.api.webshop.clear_bundle_cache_for_component",
+        "on_cancel": "trustbit_website_school.api.webshop.clear_bundle_cache_for_component",
+    },
+    "Sales Invoice": {
+        "on_submit": [
+            "trustbit_website_school.trustbit_website_school.doctype.trustbit_item_sales.trustbit_item_sales.update_item_sales",
+            "trustbit_website_school.order_status.update_linked_order_status",
+        ],
+        "on_cancel": [
+            "trustbit_website_school.trustbit_website_school.doctype.trustbit_item_sales.trustbit_item_sales.update_item_sales",
+            "trustbit_website_school.order_status.update_linked_order_status",
+        ],
+    },
+    "Item Group": {
+        "on_update": [
+            "trustbit_website_school.api.webshop.clear_category_cache",
+            "trustbit_website_school.page_cache.invalidate_doc_tags",
+            "trustbit_website_school.images.queue_image_variants",
+        ],
+        "on_trash": [
+            "trustbit_website_school.api.webshop.clear_category_cache",
+            "trustbit_website_school.page_cache.invalidate_doc_tags",
+        ],
+        "after_rename": "trustbit_website_school.api.webshop.clear_category_cache",
+    },
+    "Selling Settings": {
+        "on_update": "trustbit_website_school.trustbit_website_school.doctype.trustbit_settings.trustbit_settings.clear_settings_snapshot"
+    },
+    "Stock Settings": {
+        "on_update": "trustbit_website_school.trustbit_website_school.doctype.trustbit_settings.trustbit_settings.clear_settings_snapshot"
+    },
+    "Trustbit Banner": {
+        "on_update": [
+            "trustbit_website_school.page_cache.invalidate_doc_tags",
+            "trustbit_website_school.images.queue_image_variants",
+        ],
+        "on_trash": "trustbit_website_school.page_cache.invalidate_doc_tags",
+    },
+    "Trustbit Settings": {
+        "on_update": [
+            "trustbit_website_school.page_cache.invalidate_doc_tags",
+            "trustbit_website_school.images.queue_image_variants",
+        ],
+        "on_trash": "trustbit_website_school.page_cache.invalidate_doc_tags",
+    },
+    "Trustbit Announcement": {
+        "on_update": "trustbit_website_school.page_cache.invalidate_doc_tags",
+        "on_trash": "trustbit_website_school.page_cache.invalidate_doc_tags",
+    },
+    "Trustbit Team Member": {
+        "on_update": "trustbit_website_school.page_cache.invalidate_doc_tags",
+        "on_trash": "trustbit_website_school.page_cache.invalidate_doc_tags",
+    },
+    "Sales Order": {
+        "on_change": "trustbit_website_school.order_status.update_order_status",
+        "on_trash": "trustbit_website_school.order_status.update_order_status",
+    },
+    "Delivery Note": {
+        "on_submit": "trustbit_website_school.order_status.update_linked_order_status",
+        "on_cancel": "trustbit_website_school.order_status.update_linked_order_status",
+    },
+    "File": {
+        "on_trash": "trustbit_website_school.images.delete_image_variants",
+    },
+    "Quotation": {
+        "on_change": "trustbit_website_school.cart_summary.update_cart_summary",
+        "on_trash": "trustbit_website_school.cart_summary.update_cart_summary",
+    },
+}
+
 # Scheduled Tasks
 # ---------------
 
@@ -28,6 +157,15 @@ scheduler_events = {
     "daily": [
         "trustbit_website_school.tasks.update_trending_products"
     ],
+    "cron": {
+        "*/15 * * * *": [
+            "trustbit_website_school.contact_queue.send_contact_digest"
+        ],
+        # No-op unless the trustbit_scheduled_warmup site config flag is set
+        "*/5 * * * *": [
+            "trustbit_website_school.warmup.warm_storefront_caches"
+        ],
+    },
 }
 
 # Fixtures
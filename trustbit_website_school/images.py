@@ -0,0 +1,287 @@
+# Copyright (c) 2024, Trustbit and contributors
+# For license information, please see license.txt
+
+"""Responsive image derivatives for storefront images.
+
+When an Item, Item Group, Trustbit Banner or Trustbit Settings image changes,
+a background job writes resized WebP and JPEG copies in WIDTHS next to the
+original file (/files/photo.jpg -> /files/photo-jpg-320w.webp, ...) plus a
+manifest with a tiny blurred placeholder as a data URI. The manifests are
+mirrored in one Redis hash, so listing APIs add srcset fields for a whole
+page of rows with a single round trip:
+
+    image_srcset       JPEG candidates, "url 320w, url 640w, ..."
+    image_srcset_webp  the same widths as WebP
+    image_placeholder  blurred data URI to show while the image loads
+
+Rows whose image has no derivatives (yet) keep only the original `image`.
+"""
+
+import base64
+import io
+import json
+import os
+
+import frappe
+
+VARIANTS_KEY = "trustbit_image_variants"
+WIDTHS = (160, 320, 640, 960)
+PLACEHOLDER_WIDTH = 16
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+SOURCE_EXTENSIONS = ("jpg", "jpeg", "png", "webp")
+
+# Doctype -> image fields served on the storefront
+IMAGE_FIELDS = {
+    "Item": ("image",),
+    "Item Group": ("image",),
+    "Trustbit Banner": ("image",),
+    "Trustbit Settings": ("hero_image", "about_image"),
+}
+
+
+# ============================================
+# LOOKUP
+# ============================================
+
+def add_image_variants(rows, field="image"):
+    """Set srcset fields on every row that has derivatives for `field`; returns rows"""
+    urls = list({row.get(field) for row in rows if row and row.get(field)})
+    if not urls:
+        return rows
+
+    manifests = get_manifests(urls)
+    for row in rows:
+        manifest = row and manifests.get(row.get(field))
+        if manifest:
+            row[f"{field}_srcset"] = get_srcset(manifest["jpeg"])
+            row[f"{field}_srcset_webp"] = get_srcset(manifest["webp"])
+            row[f"{field}_placeholder"] = manifest["placeholder"]
+
+    return rows
+
+
+def get_manifests(urls):
+    """{file url: manifest} from the Redis mirror, falling back to the manifest files"""
+    cache = frappe.cache()
+    key = cache.make_key(VARIANTS_KEY)
+    pipe = cache.pipeline()
+    pipe.hmget(key, urls)
+    (values,) = pipe.execute()
+
+    manifests = {}
+    missing = {}
+    for url, value in zip(urls, values):
+        if value is None:
+            # Not mirrored (new site or flushed Redis); "" marks "no derivatives"
+            manifest = read_manifest(url)
+            missing[url] = json.dumps(manifest) if manifest else ""
+        else:
+            manifest = json.loads(value) if value else None
+
+        if manifest:
+            manifests[url] = manifest
+
+    if missing:
+        pipe.hset(key, mapping=missing)
+        pipe.execute()
+
+    return manifests
+
+
+def get_srcset(candidates):
+    return ", ".join(f"{url} {width}w" for url, width in candidates)
+
+
+# ============================================
+# GENERATION
+# ============================================
+
+def queue_image_variants(doc, method=None):
+    """doc_event: generate derivatives in the background for changed image fields"""
+    for field in IMAGE_FIELDS.get(doc.doctype, ()):
+        url = doc.get(field)
+        if not url or not doc.has_value_changed(field) or not get_source_path(url):
+            continue
+        if os.path.exists(get_variant_path(url, "variants.json")):
+            continue
+
+        frappe.enqueue(
+            "trustbit_website_school.images.generate_image_variants",
+            queue="long",
+            file_url=url,
+            doctype=doc.doctype,
+            name=doc.name,
+            enqueue_after_commit=True
+        )
+
+
+def generate_image_variants(file_url, doctype=None, name=None):
+    """Background job: write the derivatives and manifest of one image"""
+    source = get_source_path(file_url)
+    if not source or not os.path.exists(source):
+        return
+
+    try:
+        manifest = build_variants(file_url, source)
+    except Exception:
+        frappe.log_error(title=f"Image variants failed for {file_url}")
+        return
+
+    with open(get_variant_path(file_url, "variants.json"), "w") as f:
+        json.dump(manifest, f)
+
+    cache = frappe.cache()
+    pipe = cache.pipeline()
+    pipe.hset(cache.make_key(VARIANTS_KEY), file_url, json.dumps(manifest))
+    pipe.execute()
+
+    if doctype:
+        clear_image_caches(doctype, name)
+
+
+def build_variants(file_url, source):
+    from PIL import Image, ImageFilter, ImageOps
+
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original)
+        image = image.convert("RGBA" if has_alpha(image) else "RGB")
+
+    # JPEG has no alpha channel: flatten transparent images onto white
+    flat = image
+    if image.mode == "RGBA":
+        flat = Image.new("RGB", image.size, (255, 255, 255))
+        flat.paste(image, mask=image.getchannel("A"))
+
+    manifest = {"width": image.width, "height": image.height, "webp": [], "jpeg": []}
+    for width in sorted({min(width, image.width) for width in WIDTHS}):
+        size = (width, max(1, round(image.height * width / image.width)))
+
+        webp_url = get_variant_url(file_url, f"{width}w.webp")
+        image.resize(size, Image.LANCZOS).save(
+            get_variant_path(file_url, f"{width}w.webp"), "WEBP", quality=WEBP_QUALITY, method=4
+        )
+        manifest["webp"].append((webp_url, width))
+
+        jpeg_url = get_variant_url(file_url, f"{width}w.jpg")
+        flat.resize(size, Image.LANCZOS).save(
+            get_variant_path(file_url, f"{width}w.jpg"), "JPEG", quality=JPEG_QUALITY,
+            optimize=True, progressive=True
+        )
+        manifest["jpeg"].append((jpeg_url, width))
+
+    placeholder = flat.copy()
+    placeholder.thumbnail((PLACEHOLDER_WIDTH, PLACEHOLDER_WIDTH))
+    buffer = io.BytesIO()
+    placeholder.filter(ImageFilter.GaussianBlur(1)).save(buffer, "JPEG", quality=40)
+    manifest["placeholder"] = "data:image/jpeg;base64," + base64.b64encode(buffer.getvalue()).decode()
+
+    return manifest
+
+
+def has_alpha(image):
+    return image.mode in ("RGBA", "LA", "PA") or (image.mode == "P" and "transparency" in image.info)
+
+
+def clear_image_caches(doctype, name):
+    """Drop cached data and pages that were built without the new srcset"""
+    from trustbit_website_school.api.webshop import clear_bundle_cache_for, clear_category_cache
+    from trustbit_website_school.page_cache import DOCTYPE_TAGS, invalidate_cache_tags
+    from trustbit_website_school.trustbit_website_school.doctype.trustbit_banner.trustbit_banner import clear_banner_cache
+
+    if doctype == "Item":
+        bundle_codes = frappe.get_all(
+            "Product Bundle Item",
+            filters={"item_code": name, "parenttype": "Product Bundle"},
+            pluck="parent",
+            distinct=True
+        )
+        clear_bundle_cache_for(bundle_codes, composition=True)
+    elif doctype == "Item Group":
+        clear_category_cache()
+    elif doctype == "Trustbit Banner":
+        clear_banner_cache()
+
+    invalidate_cache_tags(*DOCTYPE_TAGS.get(doctype, ()))
+
+
+def generate_all_image_variants():
+    """Backfill derivatives for every storefront image that has none"""
+    for doctype, fields in IMAGE_FIELDS.items():
+        if frappe.get_meta(doctype).issingle:
+            docs = [frappe.get_cached_doc(doctype).as_dict()]
+        else:
+            docs = frappe.get_all(doctype, fields=["name", *fields])
+
+        for doc in docs:
+            for field in fields:
+                url = doc.get(field)
+                if url and get_source_path(url) and not os.path.exists(get_variant_path(url, "variants.json")):
+                    generate_image_variants(url)
+
+    # One invalidation for the whole run instead of one per image
+    from trustbit_website_school.api.webshop import clear_category_cache
+    from trustbit_website_school.page_cache import invalidate_cache_tags
+
+    clear_category_cache()
+    invalidate_cache_tags("items", "bundles", "categories", "banners", "settings")
+
+
+# ============================================
+# FILES
+# ============================================
+
+def delete_image_variants(doc, method=None):
+    """File on_trash: remove the derivatives of a deleted image"""
+    file_url = doc.file_url
+    if not file_url or not get_source_path(file_url):
+        return
+    # Identical uploads share one file on disk; keep it while another File uses it
+    if frappe.db.exists("File", {"file_url": file_url, "name": ["!=", doc.name]}):
+        return
+
+    manifest = read_manifest(file_url)
+    for url, _width in (manifest or {}).get("webp", []) + (manifest or {}).get("jpeg", []):
+        remove_file(frappe.get_site_path("public", url.lstrip("/")))
+    remove_file(get_variant_path(file_url, "variants.json"))
+
+    cache = frappe.cache()
+    pipe = cache.pipeline()
+    pipe.hdel(cache.make_key(VARIANTS_KEY), file_url)
+    pipe.execute()
+
+
+def read_manifest(file_url):
+    path = get_variant_path(file_url, "variants.json")
+    if not get_source_path(file_url) or not os.path.exists(path):
+        return None
+
+    with open(path) as f:
+        return json.load(f)
+
+
+def get_source_path(file_url):
+    """Disk path of a public image this module can resize, else None"""
+    if not file_url.startswith("/files/"):
+        return None
+
+    extension = file_url.rsplit(".", 1)[-1].lower()
+    if extension not in SOURCE_EXTENSIONS:
+        return None
+
+    return frappe.get_site_path("public", file_url.lstrip("/"))
+
+
+def get_variant_url(file_url, suffix):
+    """/files/photo.jpg + "320w.webp" -> /files/photo-jpg-320w.webp"""
+    stem, extension = file_url.rsplit(".", 1)
+    return f"{stem}-{extension.lower()}-{suffix}"
+
+
+def get_variant_path(file_url, suffix):
+    return frappe.get_site_path("public", get_variant_url(file_url, suffix).lstrip("/"))
+
+
+def remove_file(path):
+    if os.path.exists(path):
+        os.remove(path)
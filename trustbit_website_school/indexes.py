@@ -0,0 +1,195 @@
+# Copyright (c) 2024, Trustbit and contributors
+# For license information, please see license.txt
+
+"""Composite indexes for the webshop query patterns, and EXPLAIN checks.
+
+INDEXES lists one index per access path used by api/webshop.py, tasks.py
+and the doc_event handlers. ensure_indexes() creates the ones missing
+(skipping any whose columns are already the leading columns of an existing
+index, e.g. ERPNext's own). verify_indexes() runs EXPLAIN on a
+representative query for every hot path and fails when one falls back to a
+full table scan:
+
+    bench --site <site> trustbit-verify-indexes [--create] [--strict]
+"""
+
+import frappe
+from frappe.utils import cint
+
+# (doctype, columns, index name) - access path it serves in the comment
+INDEXES = [
+    # get_latest_products: disabled = 0 AND is_sales_item = 1 ORDER BY creation DESC
+    ("Item", ("disabled", "is_sales_item", "creation"), "trustbit_item_latest"),
+    # get_category_products / build_categories: item_group = ? AND disabled = 0 ORDER BY item_name
+    ("Item", ("item_group", "disabled", "item_name"), "trustbit_item_group_name"),
+    # get_category_products sorted by newest
+    ("Item", ("item_group", "disabled", "creation"), "trustbit_item_group_creation"),
+    # get_category_products sorted by recently updated
+    ("Item", ("item_group", "disabled", "modified"), "trustbit_item_group_modified"),
+    # get_item_prices: item_code IN (...) AND price_list = ? AND selling = 1
+    ("Item Price", ("item_code", "price_list", "selling"), "trustbit_item_price_lookup"),
+    # get_item_stocks: item_code IN (...) AND warehouse = ?
+    ("Bin", ("item_code", "warehouse"), "trustbit_bin_item_warehouse"),
+    # rebuild_item_sales: docstatus = 1 AND posting_date >= ?
+    ("Sales Invoice", ("docstatus", "posting_date"), "trustbit_sinv_posting"),
+    # get_trending_sales: sales_date >= ? GROUP BY item_code, SUM(qty) (also created by the doctype)
+    ("Trustbit Item Sales", ("sales_date", "item_code", "qty"), "sales_date_item_qty"),
+    # get_order_history: customer = ? ORDER BY creation DESC (keyset)
+    ("Sales Order", ("customer", "creation"), "trustbit_so_customer_creation"),
+    # order status projection: deliveries against a Sales Order
+    ("Delivery Note Item", ("against_sales_order",), "trustbit_dni_sales_order"),
+    # bundle joins on the bundle item code
+    ("Product Bundle", ("new_item_code",), "trustbit_bundle_item_code"),
+    # clear_bundle_cache_for_component: bundles containing a component (every stock movement)
+    ("Product Bundle Item", ("item_code", "parenttype"), "trustbit_bundle_component"),
+]
+
+# Below this many estimated rows a full scan is the optimizer's cheapest
+# plan anyway (small development sites), so it is reported but not failed
+MIN_SCAN_ROWS = 1000
+
+
+# ============================================
+# INDEX CREATION
+# ============================================
+
+def ensure_indexes():
+    """Create every missing index; returns the names created"""
+    created = []
+    for doctype, columns, index_name in INDEXES:
+        if not frappe.db.table_exists(doctype) or has_index(doctype, columns):
+            continue
+
+        frappe.db.add_index(doctype, list(columns), index_name)
+        created.append(index_name)
+
+    return created
+
+
+def get_missing_indexes():
+    return [
+        (doctype, columns, index_name)
+        for doctype, columns, index_name in INDEXES
+        if frappe.db.table_exists(doctype) and not has_index(doctype, columns)
+    ]
+
+
+def has_index(doctype, columns):
+    """Whether an existing index starts with exactly these columns"""
+    indexes = {}
+    for row in frappe.db.sql(f"SHOW INDEX FROM `tab{doctype}`", as_dict=True):
+        indexes.setdefault(row.Key_name, {})[cint(row.Seq_in_index)] = row.Column_name
+
+    for index_columns in indexes.values():
+        ordered = tuple(index_columns[seq] for seq in sorted(index_columns))
+        if ordered[:len(columns)] == tuple(columns):
+            return True
+
+    return False
+
+
+# ============================================
+# EXPLAIN CHECKS
+# ============================================
+
+def get_hot_queries():
+    """(label, query, params) for every hot access path, with sample values"""
+    item_group = frappe.db.get_value("Item", {"disabled": 0}, "item_group") or ""
+    item_codes = frappe.get_all("Item", filters={"disabled": 0}, pluck="name", limit=20) or [""]
+    customer = frappe.db.get_value("Sales Order", {}, "customer") or ""
+    sales_order = frappe.db.get_value("Sales Order", {}, "name") or ""
+    price_list = frappe.db.get_single_value("Selling Settings", "selling_price_list") or ""
+    warehouse = frappe.db.get_single_value("Stock Settings", "default_warehouse") or ""
+
+    return [
+        ("latest products", """
+            SELECT name FROM `tabItem`
+            WHERE disabled = 0 AND is_sales_item = 1
+            ORDER BY creation DESC LIMIT 8
+        """, {}),
+        ("category products by name", """
+            SELECT name FROM `tabItem`
+            WHERE item_group = %(item_group)s AND disabled = 0
+            ORDER BY item_name ASC, name ASC LIMIT 20
+        """, {"item_group": item_group}),
+        ("category products by newest", """
+            SELECT name FROM `tabItem`
+            WHERE item_group = %(item_group)s AND disabled = 0
+            ORDER BY creation DESC, name DESC LIMIT 20
+        """, {"item_group": item_group}),
+        ("category products by modified", """
+            SELECT name FROM `tabItem`
+            WHERE item_group = %(item_group)s AND disabled = 0
+            ORDER BY modified DESC, name DESC LIMIT 20
+        """, {"item_group": item_group}),
+        ("item prices", """
+            SELECT item_code, price_list_rate FROM `tabItem Price`
+            WHERE item_code IN %(item_codes)s AND price_list = %(price_list)s AND selling = 1
+        """, {"item_codes": item_codes, "price_list": price_list}),
+        ("item stock", """
+            SELECT item_code, actual_qty FROM `tabBin`
+            WHERE item_code IN %(item_codes)s AND warehouse = %(warehouse)s
+        """, {"item_codes": item_codes, "warehouse": warehouse}),
+        ("trending rollup rebuild", """
+            SELECT name FROM `tabSales Invoice`
+            WHERE docstatus = 1 AND posting_date >= CURDATE() - INTERVAL 30 DAY
+        """, {}),
+        ("trending products", """
+            SELECT s.item_code, SUM(s.qty) as total_qty
+            FROM `tabTrustbit Item Sales` s
+            INNER JOIN `tabItem` i ON i.name = s.item_code
+            WHERE s.sales_date >= CURDATE() - INTERVAL 30 DAY AND i.disabled = 0
+            GROUP BY s.item_code
+            HAVING total_qty > 0
+            ORDER BY total_qty DESC LIMIT 8
+        """, {}),
+        ("order history", """
+            SELECT name FROM `tabSales Order`
+            WHERE customer = %(customer)s
+            ORDER BY creation DESC, name DESC LIMIT 20
+        """, {"customer": customer}),
+        ("order deliveries", """
+            SELECT parent FROM `tabDelivery Note Item`
+            WHERE against_sales_order = %(sales_order)s
+        """, {"sales_order": sales_order}),
+        ("bundle components", """
+            SELECT DISTINCT parent FROM `tabProduct Bundle Item`
+            WHERE item_code = %(item_code)s AND parenttype = 'Product Bundle'
+        """, {"item_code": item_codes[0]}),
+        ("bundle listing", """
+            SELECT pb.name FROM `tabProduct Bundle` pb
+            INNER JOIN `tabItem` i ON i.item_code = pb.new_item_code
+            WHERE i.disabled = 0
+            ORDER BY i.item_name ASC, i.name ASC LIMIT 20
+        """, {}),
+    ]
+
+
+def verify_indexes(strict=False):
+    """EXPLAIN every hot query; returns (ok, report lines)
+
+    A query fails when any table in its plan is read with a full scan
+    (type ALL) over at least MIN_SCAN_ROWS estimated rows, or over any
+    number of rows with `strict`.
+    """
+    ok = True
+    lines = []
+
+    for doctype, columns, index_name in get_missing_indexes():
+        ok = False
+        lines.append(f"MISSING  {index_name} on {doctype} ({', '.join(columns)})")
+
+    for label, query, params in get_hot_queries():
+        for row in frappe.db.sql(f"EXPLAIN {query}", params, as_dict=True):
+            full_scan = (row.get("type") or "").upper() == "ALL"
+            rows = cint(row.get("rows"))
+            failed = full_scan and (strict or rows >= MIN_SCAN_ROWS)
+            ok = ok and not failed
+
+            status = "FAIL" if failed else ("SCAN" if full_scan else "OK")
+            lines.append(
+                f"{status:<8} {label:<28} {row.get('table')}: type={row.get('type')} "
+                f"key={row.get('key')} rows={rows}"
+            )
+
+    return ok, lines
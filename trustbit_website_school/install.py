@@ -11,6 +11,9 @@ def after_install():
     create_custom_item_group_fields()
     setup_default_settings()
     frappe.db.commit()
+    create_query_indexes()
+    build_search_index()
+    build_item_sales_rollup()
     print("Trustbit Website School installed successfully!")
 
 
@@ -29,14 +32,16 @@ def create_custom_item_fields():
                 "fieldtype": "Data",
                 "label": "School Name",
                 "insert_after": "trustbit_section",
-                "description": "For school-specific products and bundles"
+                "description": "For school-specific products and bundles",
+                "search_index": 1
             },
             {
                 "fieldname": "trustbit_class",
                 "fieldtype": "Data",
                 "label": "Class",
                 "insert_after": "trustbit_school",
-                "description": "e.g., Class 1, Class 8, UKG"
+                "description": "e.g., Class 1, Class 8, UKG",
+                "search_index": 1
             },
             {
                 "fieldname": "trustbit_column_break",
@@ -103,3 +108,31 @@ def setup_default_settings():
     settings.copyright_text = "© 2024 All rights reserved."
     settings.save()
     print("Default Trustbit Settings created")
+
+
+def build_search_index():
+    """Index existing items for the webshop search"""
+    from trustbit_website_school.trustbit_website_school.doctype.trustbit_search_index.trustbit_search_index import rebuild_search_index
+    
+    total = rebuild_search_index()
+    print(f"Search index built for {total} items")
+
+
+def build_item_sales_rollup():
+    """Backfill the daily item sales buckets that trending products read"""
+    from frappe.utils import add_days, today
+    from trustbit_website_school.trustbit_website_school.doctype.trustbit_item_sales.trustbit_item_sales import (
+        RETENTION_DAYS, rebuild_item_sales
+    )
+    
+    rebuild_item_sales(add_days(today(), -RETENTION_DAYS))
+    frappe.db.commit()
+    print(f"Item sales rollup built for the last {RETENTION_DAYS} days")
+
+
+def create_query_indexes():
+    """Create the composite indexes used by the webshop queries"""
+    from trustbit_website_school.indexes import ensure_indexes
+    
+    created = ensure_indexes()
+    print(f"Created {len(created)} query indexes")
@@ -0,0 +1,152 @@
+# Copyright (c) 2024, Trustbit and contributors
+# For license information, please see license.txt
+
+"""Order-status projection for public order tracking.
+
+A compact snapshot of each Sales Order (status, delivery status, timeline
+dates and latest delivery) is kept in Redis and refreshed from Sales Order,
+Delivery Note and Sales Invoice events, so tracking polls do not touch the
+database. Unknown order ids are cached briefly as well. The TTL is a safety
+net for status changes that bypass doc_events (e.g. closing an order).
+"""
+
+import frappe
+from frappe.utils import flt
+
+from trustbit_website_school.page_cache import invalidate_cache_tags
+
+ORDER_STATUS_KEY = "trustbit_order_status"
+PROJECTION_TTL = 3600
+NOT_FOUND_TTL = 60
+
+
+def get_order_status(order_id):
+    """Get the tracking projection of an order, or None if it does not exist"""
+    cache_key = get_order_status_key(order_id)
+    projection = frappe.cache().get_value(cache_key)
+
+    if projection is None:
+        # Cache misses for unknown ids too ({}), so typos can't hammer the database
+        projection = build_order_status(order_id) or {}
+        frappe.cache().set_value(
+            cache_key, projection, expires_in_sec=PROJECTION_TTL if projection else NOT_FOUND_TTL
+        )
+
+    return projection or None
+
+
+def get_order_status_key(order_id):
+    return f"{ORDER_STATUS_KEY}::{order_id}"
+
+
+def build_order_status(order_name):
+    """Read the order header, item count and deliveries into a projection"""
+    order = frappe.db.get_value(
+        "Sales Order",
+        order_name,
+        ["name", "transaction_date", "status", "delivery_status", "grand_total"],
+        as_dict=True
+    )
+    if not order:
+        return None
+
+    deliveries = []
+    if order.status in ["Completed", "Closed"] or order.delivery_status in ["Partially Delivered", "Fully Delivered"]:
+        deliveries = get_order_deliveries(order.name)
+
+    return {
+        "order": {
+            "id": order.name,
+            "date": str(order.transaction_date),
+            "status": order.status,
+            "delivery_status": order.delivery_status,
+            "total": flt(order.grand_total),
+            "items_count": frappe.db.count("Sales Order Item", {"parent": order.name, "parenttype": "Sales Order"}),
+        },
+        "timeline": get_order_timeline(order, deliveries),
+        "delivery": deliveries[-1] if deliveries else {},
+    }
+
+
+def get_order_deliveries(order_name):
+    """Submitted Delivery Notes raised against a Sales Order, oldest first"""
+    deliveries = frappe.db.sql("""
+        SELECT dn.name, dn.posting_date, dn.transporter_name, dn.lr_no
+        FROM `tabDelivery Note` dn
+        WHERE dn.docstatus = 1
+            AND dn.name IN (
+                SELECT dni.parent
+                FROM `tabDelivery Note Item` dni
+                WHERE dni.against_sales_order = %s
+            )
+        ORDER BY dn.posting_date ASC, dn.creation ASC
+    """, order_name, as_dict=True)
+
+    for delivery in deliveries:
+        delivery.posting_date = str(delivery.posting_date)
+
+    return deliveries
+
+
+def get_order_timeline(order, deliveries=None):
+    """Build order timeline"""
+    deliveries = deliveries or []
+    processing = order.status not in ["Draft", "Cancelled"]
+    shipped = order.delivery_status in ["Partially Delivered", "Fully Delivered"]
+    delivered = order.delivery_status == "Fully Delivered" or order.status in ["Completed", "Closed"]
+
+    return [
+        {
+            "step": "Order Placed",
+            "done": True,
+            "date": str(order.transaction_date)
+        },
+        {
+            "step": "Processing",
+            "done": processing,
+            "date": str(order.transaction_date) if processing else None
+        },
+        {
+            "step": "Shipped",
+            "done": shipped,
+            "date": deliveries[0].posting_date if shipped and deliveries else None
+        },
+        {
+            "step": "Delivered",
+            "done": delivered,
+            "date": deliveries[-1].posting_date if delivered and deliveries else None
+        }
+    ]
+
+
+def refresh_order_status(order_names):
+    """Rebuild the projection of the given orders"""
+    order_names = set(filter(None, order_names))
+    if not order_names:
+        return
+
+    for order_name in order_names:
+        projection = build_order_status(order_name) or {}
+        frappe.cache().set_value(
+            get_order_status_key(order_name),
+            projection,
+            expires_in_sec=PROJECTION_TTL if projection else NOT_FOUND_TTL
+        )
+
+    invalidate_cache_tags("orders")
+
+
+def update_order_status(doc, method=None):
+    """Sales Order doc_event: refresh (or drop) the order's projection"""
+    if method == "on_trash":
+        frappe.cache().delete_value(get_order_status_key(doc.name))
+        invalidate_cache_tags("orders")
+        return
+
+    refresh_order_status([doc.name])
+
+
+def update_linked_order_status(doc, method=None):
+    """Delivery Note / Sales Invoice doc_event: refresh the orders it was made against"""
+    link_field = "against_sales_order" if doc.doctype == "Delivery Note" else "sales_order"
+    refresh_order_status([row.get(link_field) for row in doc.items])
@@ -0,0 +1,148 @@
+# Copyright (c) 2024, Trustbit and contributors
+# For license information, please see license.txt
+
+"""Guest page cache for the storefront.
+
+Rendered HTML of public shop pages is cached per full URL (route + query
+string) for guests. Each page lists the cache tags it depends on; the
+current version of every tag is part of the cache key, so bumping a tag
+from a doc_event invalidates every page built on it without scanning keys.
+
+Frappe's own website cache is not used because it is keyed by path only
+(ignoring ?page=, ?q=, ...) and it would be shared with logged-in users.
+"""
+
+import hashlib
+
+import frappe
+from frappe.utils import get_build_version
+from frappe.website.page_renderers.template_page import TemplatePage
+
+from trustbit_website_school.profiling import measure
+
+PAGE_CACHE_KEY = "trustbit_page"
+TAG_VERSION_KEY = "trustbit_cache_tag"
+# Endpoints of this app's shop pages (templates/pages/trustbit_*.html)
+STOREFRONT_PAGE_PREFIX = "trustbit_"
+
+# Cacheable page endpoint -> (cache tags, ttl in seconds)
+CACHEABLE_PAGES = {
+    "trustbit_shop": (("items", "bundles", "banners", "categories", "settings"), 300),
+    "trustbit_categories": (("categories", "settings"), 600),
+    "trustbit_category": (("items", "categories", "settings"), 300),
+    "trustbit_bundles": (("bundles", "items", "categories", "settings"), 300),
+    "trustbit_bundle_detail": (("bundles", "items", "categories", "settings"), 300),
+    "trustbit_search": (("items", "bundles", "categories", "settings"), 120),
+    "trustbit_about": (("team", "categories", "settings"), 3600),
+    "trustbit_announcements": (("announcements", "categories", "settings"), 600),
+    "trustbit_contact": (("categories", "settings"), 3600),
+    # Short TTL: order tracking is polled, projections refresh from doc_events
+    "trustbit_track_order": (("orders", "categories", "settings"), 30),
+}
+
+# Doctype -> cache tags invalidated when a document of that type changes
+DOCTYPE_TAGS = {
+    "Item": ("items", "categories"),
+    "Item Price": ("items", "bundles"),
+    "Item Group": ("categories",),
+    "Product Bundle": ("bundles",),
+    "Trustbit Banner": ("banners",),
+    "Trustbit Settings": ("settings",),
+    "Trustbit Announcement": ("announcements",),
+    "Trustbit Team Member": ("team",),
+}
+
+# Tag -> function returning how many more seconds data cached on it stays
+# valid, for tags whose data also changes with time instead of a doc_event
+TAG_LIFETIMES = {
+    "banners": "trustbit_website_school.trustbit_website_school.doctype.trustbit_banner.trustbit_banner.get_banner_cache_ttl",
+}
+
+
+class StorefrontPage(TemplatePage):
+    """Template page renderer for the shop pages, timed when instrumentation is on"""
+
+    def can_render(self):
+        return self.path.startswith(STOREFRONT_PAGE_PREFIX) and super().can_render()
+
+    def render(self):
+        with measure(f"page:{self.path}"):
+            return self.render_page()
+
+    def render_page(self):
+        return super().render()
+
+
+class GuestPageCache(StorefrontPage):
+    """Storefront page renderer that serves cached HTML to guests"""
+
+    def can_render(self):
+        return (
+            self.path in CACHEABLE_PAGES
+            and frappe.session.user == "Guest"
+            and frappe.request.method == "GET"
+            and not frappe.conf.developer_mode
+            and super().can_render()
+        )
+
+    def render_page(self):
+        tags, ttl = CACHEABLE_PAGES[self.path]
+        cache_key = get_page_cache_key(frappe.request.full_path, tags)
+
+        html = frappe.cache().get_value(cache_key)
+        if html is None:
+            html = self.get_html()
+            frappe.cache().set_value(cache_key, html, expires_in_sec=get_cache_ttl(ttl, tags))
+        else:
+            frappe.local.response.from_cache = True
+
+        html = self.add_csrf_token(html)
+        return self.build_response(html)
+
+
+def get_page_cache_key(url, tags):
+    versions = ":".join(get_tag_version(tag) for tag in tags)
+    # Cached HTML links content-hashed bundles; a new build must not serve stale links
+    build = get_build_version()
+    digest = hashlib.md5(f"{frappe.local.lang}|{url}|{versions}|{build}".encode()).hexdigest()
+    return f"{PAGE_CACHE_KEY}::{digest}"
+
+
+def get_tagged_cache_key(prefix, name, tags):
+    """Cache key that changes whenever one of `tags` is invalidated"""
+    versions = ":".join(get_tag_version(tag) for tag in tags)
+    return f"{prefix}::{name}::{versions}"
+
+
+def get_cache_ttl(ttl, tags):
+    """Cap a TTL so the entry expires when time-dependent tag data changes"""
+    for tag in tags:
+        if tag in TAG_LIFETIMES:
+            ttl = min(ttl, frappe.get_attr(TAG_LIFETIMES[tag])())
+
+    return ttl
+
+
+def get_tag_version(tag):
+    version = frappe.cache().get_value(f"{TAG_VERSION_KEY}::{tag}")
+    if version is None:
+        version = frappe.generate_hash(length=8)
+        frappe.cache().set_value(f"{TAG_VERSION_KEY}::{tag}", version)
+
+    return version
+
+
+def invalidate_cache_tags(*tags):
+    """Bump tag versions so every cached entry built on them is skipped"""
+    for tag in tags:
+        frappe.cache().set_value(f"{TAG_VERSION_KEY}::{tag}", frappe.generate_hash(length=8))
+
+
+def invalidate_doc_tags(doc, method=None):
+    """doc_event: invalidate cached pages that depend on this doctype"""
+    invalidate_cache_tags(*DOCTYPE_TAGS.get(doc.doctype, ()))
+
+
+def clear_page_cache():
+    """Drop all cached guest pages (e.g. after a deploy)"""
+    frappe.cache().delete_keys(PAGE_CACHE_KEY)
@@ -0,0 +1,9 @@
+# Copyright (c) 2024, Trustbit and contributors
+# For license information, please see license.txt
+
+from trustbit_website_school.indexes import ensure_indexes
+
+
+def execute():
+    """Create the composite indexes used by the webshop queries"""
+    ensure_indexes()
@@ -0,0 +1,13 @@
+# Copyright (c) 2024, Trustbit and contributors
+# For license information, please see license.txt
+
+from frappe.utils import add_days, today
+
+from trustbit_website_school.trustbit_website_school.doctype.trustbit_item_sales.trustbit_item_sales import (
+    RETENTION_DAYS, rebuild_item_sales
+)
+
+
+def execute():
+    """Backfill daily item sales buckets from submitted Sales Invoices"""
+    rebuild_item_sales(add_days(today(), -RETENTION_DAYS))
@@ -0,0 +1,9 @@
+# Copyright (c) 2024, Trustbit and contributors
+# For license information, please see license.txt
+
+from trustbit_website_school.trustbit_website_school.doctype.trustbit_search_index.trustbit_search_index import rebuild_search_index
+
+
+def execute():
+    """Populate the Trustbit Search Index for existing items"""
+    rebuild_search_index()
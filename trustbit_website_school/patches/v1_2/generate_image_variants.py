@@ -0,0 +1,13 @@
+# Copyright (c) 2024, Trustbit and contributors
+# For license information, please see license.txt
+
+import frappe
+
+
+def execute():
+    """Backfill responsive image derivatives in the background, not during migrate"""
+    frappe.enqueue(
+        "trustbit_website_school.images.generate_all_image_variants",
+        queue="long",
+        timeout=60 * 60
+    )
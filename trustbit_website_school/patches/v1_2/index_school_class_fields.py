@@ -0,0 +1,18 @@
+# Copyright (c) 2024, Trustbit and contributors
+# For license information, please see license.txt
+
+import frappe
+
+
+def execute():
+    """Index the Item school and class custom fields used for facet filters"""
+    for fieldname in ("trustbit_school", "trustbit_class"):
+        name = frappe.db.get_value("Custom Field", {"dt": "Item", "fieldname": fieldname})
+        if not name:
+            continue
+
+        custom_field = frappe.get_doc("Custom Field", name)
+        if not custom_field.search_index:
+            # Saving the Custom Field adds the column index
+            custom_field.search_index = 1
+            custom_field.save()
@@ -0,0 +1,311 @@
+# Copyright (c) 2024, Trustbit and contributors
+# For license information, please see license.txt
+
+"""Lightweight SQL profiling helpers and opt-in API instrumentation."""
+
+import inspect
+import json
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+import frappe
+from frappe.utils import cint, now
+
+
+class QueryCounter:
+    """Context manager counting the SQL queries run on frappe.db inside it
+
+    Wraps `frappe.db.sql` the same way Frappe's recorder does, so queries made
+    through get_all, get_value, count, ... are counted as well.
+    """
+
+    def __init__(self, record=False):
+        self.record = record
+        self.count = 0
+        self.time = 0.0
+        self.queries = []
+        self._sql = None
+
+    def __enter__(self):
+        self._sql = frappe.db.sql
+
+        def sql(query, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return self._sql(query, *args, **kwargs)
+            finally:
+                self.count += 1
+                self.time += time.perf_counter() - start
+                if self.record:
+                    self.queries.append({
+                        "query": str(query).strip(),
+                        "ms": round((time.perf_counter() - start) * 1000, 2),
+                    })
+
+        frappe.db.sql = sql
+        return self
+
+    def __exit__(self, *exc):
+        frappe.db.sql = self._sql
+        return False
+
+
+# ============================================
+# API INSTRUMENTATION
+# ============================================
+#
+# Opt-in per site:  bench --site <site> set-config trustbit_instrumentation 1
+#
+# Every call of an @instrument-ed function then records wall time, SQL query
+# count and time, and cache hits/misses. The last SAMPLE_SIZE samples of each
+# endpoint are kept in Redis for rolling percentiles, and slow calls are kept
+# with their query list. When disabled the wrapper only checks the flag.
+
+PERF_KEY = "trustbit_perf"
+PERF_ENDPOINTS_KEY = "trustbit_perf_endpoints"
+SLOW_SAMPLES_KEY = "trustbit_perf_slow"
+SAMPLE_SIZE = 1000
+SLOW_SAMPLE_COUNT = 50
+SLOW_REQUEST_MS = 1000
+# Queries kept per slow sample, and characters kept per query
+SLOW_SAMPLE_QUERIES = 100
+SLOW_SAMPLE_QUERY_LENGTH = 1000
+
+_cache_hook_installed = False
+
+
+def instrument(fn):
+    """Record latency, SQL and cache statistics of a whitelisted API
+
+    Pages are timed by the storefront page renderer (page_cache.py) with
+    measure(), not by decorating get_context: Frappe picks the arguments of
+    get_context from its own signature, which a wrapper hides.
+    """
+    endpoint = fn.__name__
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        with measure(endpoint):
+            return fn(*args, **kwargs)
+
+    # frappe.handler only passes the request arguments listed in fnargs.
+    # Read them from the innermost function: rate_limit and other wrappers
+    # only expose (*args, **kwargs), which getfullargspec does not see past
+    parameters = list(inspect.signature(inspect.unwrap(fn)).parameters.values())
+    if not any(parameter.kind == parameter.VAR_KEYWORD for parameter in parameters):
+        wrapper.fnargs = [
+            parameter.name for parameter in parameters
+            if parameter.kind in (parameter.POSITIONAL_OR_KEYWORD, parameter.KEYWORD_ONLY)
+        ]
+
+    return wrapper
+
+
+@contextmanager
+def measure(endpoint):
+    """Record one sample for `endpoint` around the block, when instrumentation is on"""
+    if not frappe.conf.get("trustbit_instrumentation"):
+        yield
+        return
+
+    install_cache_hook()
+    outer_stats = getattr(frappe.local, "trustbit_cache_stats", None)
+    frappe.local.trustbit_cache_stats = cache_stats = [0, 0]
+
+    start = time.perf_counter()
+    try:
+        with QueryCounter(record=True) as counter:
+            yield
+    finally:
+        wall_ms = (time.perf_counter() - start) * 1000
+        frappe.local.trustbit_cache_stats = outer_stats
+        if outer_stats is not None:
+            outer_stats[0] += cache_stats[0]
+            outer_stats[1] += cache_stats[1]
+        record_sample(endpoint, wall_ms, counter, cache_stats)
+
+
+def install_cache_hook():
+    """Count RedisWrapper.get_value hits/misses while a call is instrumented"""
+    global _cache_hook_installed
+    if _cache_hook_installed:
+        return
+
+    from frappe.utils.redis_wrapper import RedisWrapper
+
+    get_value = RedisWrapper.get_value
+
+    def counting_get_value(self, *args, **kwargs):
+        value = get_value(self, *args, **kwargs)
+        stats = getattr(frappe.local, "trustbit_cache_stats", None)
+        if stats is not None:
+            stats[0 if value is not None else 1] += 1
+        return value
+
+    RedisWrapper.get_value = counting_get_value
+    _cache_hook_installed = True
+
+
+def record_sample(endpoint, wall_ms, counter, cache_stats):
+    cache = frappe.cache()
+    sample = f"{wall_ms:.1f},{counter.count},{counter.time * 1000:.1f},{cache_stats[0]},{cache_stats[1]}"
+
+    pipe = cache.pipeline()
+    pipe.sadd(cache.make_key(PERF_ENDPOINTS_KEY), endpoint)
+    pipe.lpush(cache.make_key(f"{PERF_KEY}::{endpoint}"), sample)
+    pipe.ltrim(cache.make_key(f"{PERF_KEY}::{endpoint}"), 0, SAMPLE_SIZE - 1)
+
+    if wall_ms >= cint(frappe.conf.get("trustbit_slow_request_ms") or SLOW_REQUEST_MS):
+        slow_sample = {
+            "endpoint": endpoint,
+            "timestamp": now(),
+            "user": frappe.session.user if getattr(frappe.local, "session", None) else None,
+            "path": frappe.request.full_path if frappe.request else None,
+            "wall_ms": round(wall_ms, 1),
+            "sql_count": counter.count,
+            "sql_ms": round(counter.time * 1000, 1),
+            "queries": [
+                {"query": query["query"][:SLOW_SAMPLE_QUERY_LENGTH], "ms": query["ms"]}
+                for query in counter.queries[:SLOW_SAMPLE_QUERIES]
+            ],
+        }
+        pipe.lpush(cache.make_key(SLOW_SAMPLES_KEY), json.dumps(slow_sample, default=str))
+        pipe.ltrim(cache.make_key(SLOW_SAMPLES_KEY), 0, SLOW_SAMPLE_COUNT - 1)
+        frappe.logger("trustbit").warning(
+            {"event": "slow_request", **{k: v for k, v in slow_sample.items() if k != "queries"}}
+        )
+
+    pipe.execute()
+
+
+@frappe.whitelist()
+def get_performance_stats():
+    """Rolling p50/p95/p99 latency, SQL and cache statistics per endpoint"""
+    frappe.only_for("System Manager")
+    cache = frappe.cache()
+
+    # Raw pipeline commands: RedisWrapper's own list/set helpers prefix keys again
+    pipe = cache.pipeline()
+    pipe.smembers(cache.make_key(PERF_ENDPOINTS_KEY))
+    pipe.lrange(cache.make_key(SLOW_SAMPLES_KEY), 0, -1)
+    members, slow_samples = pipe.execute()
+
+    names = sorted(as_text(member) for member in members)
+    for name in names:
+        pipe.lrange(cache.make_key(f"{PERF_KEY}::{name}"), 0, -1)
+
+    endpoints = {}
+    for endpoint, raw_samples in zip(names, pipe.execute()):
+        samples = [[float(value) for value in as_text(sample).split(",")] for sample in raw_samples]
+        if not samples:
+            continue
+
+        wall = sorted(sample[0] for sample in samples)
+        hits = sum(sample[3] for sample in samples)
+        misses = sum(sample[4] for sample in samples)
+        endpoints[endpoint] = {
+            "samples": len(samples),
+            "p50_ms": percentile(wall, 0.50),
+            "p95_ms": percentile(wall, 0.95),
+            "p99_ms": percentile(wall, 0.99),
+            "max_ms": wall[-1],
+            "avg_queries": round(sum(sample[1] for sample in samples) / len(samples), 1),
+            "avg_sql_ms": round(sum(sample[2] for sample in samples) / len(samples), 1),
+            "cache_hit_rate": round(hits / (hits + misses), 3) if hits + misses else None,
+        }
+
+    return {
+        "endpoints": endpoints,
+        "slow_requests": [json.loads(as_text(sample)) for sample in slow_samples],
+    }
+
+
+@frappe.whitelist(methods=["POST"])
+def reset_performance_stats():
+    """Drop all recorded samples"""
+    frappe.only_for("System Manager")
+    cache = frappe.cache()
+    pipe = cache.pipeline()
+    pipe.smembers(cache.make_key(PERF_ENDPOINTS_KEY))
+    (members,) = pipe.execute()
+
+    keys = [cache.make_key(f"{PERF_KEY}::{as_text(member)}") for member in members]
+    pipe.delete(cache.make_key(PERF_ENDPOINTS_KEY), cache.make_key(SLOW_SAMPLES_KEY), *keys)
+    pipe.execute()
+
+
+def verify_api_arguments():
+    """Check that request arguments reach every whitelisted API of this app
+
+    Runs each function's parameters through frappe.get_newargs, the filter
+    frappe.handler applies to form_dict, then calls the rate limited,
+    instrumented endpoints through frappe.call with probe arguments that
+    stop before any side effect. Returns (ok, report lines).
+    """
+    from trustbit_website_school.api import webshop
+
+    ok = True
+    lines = []
+
+    for fn in sorted(frappe.whitelisted, key=lambda fn: f"{fn.__module__}.{fn.__name__}"):
+        if not fn.__module__.startswith("trustbit_website_school"):
+            continue
+
+        parameters = [
+            name for name, parameter in inspect.signature(inspect.unwrap(fn)).parameters.items()
+            if parameter.kind in (parameter.POSITIONAL_OR_KEYWORD, parameter.KEYWORD_ONLY)
+        ]
+        passed = frappe.get_newargs(fn, {name: "probe" for name in parameters})
+        dropped = [name for name in parameters if name not in passed]
+        ok = ok and not dropped
+
+        status = "FAIL" if dropped else "OK"
+        detail = f" drops {', '.join(dropped)}" if dropped else ""
+        lines.append(f"{status:<8} {fn.__module__}.{fn.__name__}{detail}")
+
+    order_id = f"TRUSTBIT-PROBE-{frappe.generate_hash(length=8)}"
+    probes = [
+        (webshop.track_order, {"order_id": order_id}, {"found": False, "message": "Order not found"}),
+        # An invalid email is rejected after the arguments arrive, before anything is queued
+        (webshop.submit_contact_form, {
+            "name": "Probe", "email": "not-an-email", "phone": "", "message": "Probe", "subject": "Probe",
+        }, frappe.InvalidEmailAddressError),
+    ]
+    for fn, kwargs, expected in probes:
+        call_ok, detail = run_probe(fn, kwargs, expected)
+        ok = ok and call_ok
+        lines.append(f"{'OK' if call_ok else 'FAIL':<8} frappe.call({fn.__name__}, ...){detail}")
+
+    return ok, lines
+
+
+def run_probe(fn, kwargs, expected):
+    """Call fn like frappe.handler does; expected is a return value or an exception class"""
+    # rate_limit reads its key from form_dict and the caller's IP, as in a request
+    frappe.local.form_dict = frappe._dict(kwargs)
+    request_ip = getattr(frappe.local, "request_ip", None)
+    frappe.local.request_ip = request_ip or "127.0.0.1"
+    try:
+        result = frappe.call(fn, **kwargs)
+    except Exception as e:
+        if isinstance(expected, type) and isinstance(e, expected):
+            return True, ""
+        return False, f" raised {e!r}"
+    finally:
+        frappe.local.form_dict = frappe._dict()
+        frappe.local.request_ip = request_ip
+        frappe.clear_messages()
+
+    if result == expected:
+        return True, ""
+    return False, f" returned {result!r}"
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of an already sorted list"""
+    return round(values[min(len(values) - 1, int(len(values) * p))], 1)
+
+
+def as_text(value):
+    return value.decode() if isinstance(value, bytes) else value
@@ -6,8 +6,19 @@
 const TrustbitWebshop = {
     // Configuration
     config: {
-        debounceDelay: 500,
+        debounceDelay: 150,
+        // Debounce follows observed search latency within these bounds
+        minDebounceDelay: 80,
+        maxDebounceDelay: 400,
         searchMinChars: 2,
+        searchLimit: 10,
+        // LRU of query -> suggestions, kept in sessionStorage across pages
+        searchCacheSize: 50,
+        searchCacheTTL: 10 * 60 * 1000,
+        searchCacheKey: 'trustbit_search_cache',
+        recentSearchesKey: 'trustbit_recent_searches',
+        recentSearchesMax: 8,
+        prefetchCategories: 3,
         notificationDuration: 3000,
     },
 
@@ -15,6 +26,9 @@ const TrustbitWebshop = {
     state: {
         searchQuery: '',
         searchTimer: null,
+        searchController: null,
+        searchCache: new Map(),
+        searchLatency: null,
         isSearching: false,
         cart: [],
     },
@@ -28,6 +42,7 @@ const TrustbitWebshop = {
         this.initCart();
         this.initNotifications();
         this.bindEvents();
+        this.schedulePrefetch();
         console.log('Trustbit Website School initialized');
     },
 
@@ -83,6 +98,8 @@ const TrustbitWebshop = {
 
         if (!$searchInput.length) return;
 
+        this.loadSearchCache();
+
         // Input handler with debounce
         $searchInput.on('input', (e) => {
             const query = e.target.value;
@@ -93,13 +110,27 @@ const TrustbitWebshop = {
                 clearTimeout(this.state.searchTimer);
             }
 
+            if (query.trim().length < this.config.searchMinChars) {
+                this.abortSearch();
+                this.showRecentSearches();
+                return;
+            }
+
+            // Answered before, or narrowed from a shorter query: no request
+            const cached = this.getCachedResults(query);
+            if (cached) {
+                this.abortSearch();
+                this.renderSearchResults(cached);
+                return;
+            }
+
             // Show typing indicator
             this.showSearchTyping();
 
             // Set new timer
             this.state.searchTimer = setTimeout(() => {
                 this.performSearch(query);
-            }, this.config.debounceDelay);
+            }, this.getDebounceDelay());
         });
 
         // Focus handler
@@ -111,6 +142,19 @@ const TrustbitWebshop = {
             }
         });
 
+        // Recent searches
+        $searchDropdown.on('click', '.kgs-search-recent-item', (e) => {
+            e.stopPropagation();
+            $searchInput.val($(e.currentTarget).data('query')).trigger('input').focus();
+        });
+
+        $searchDropdown.on('click', '.kgs-search-recent-clear', (e) => {
+            e.preventDefault();
+            e.stopPropagation();
+            this.clearRecentSearches();
+            this.showRecentSearches();
+        });
+
         // Click outside to close
         $(document).on('click', (e) => {
             if (!$(e.target).closest('.kgs-search-container').length) {
@@ -122,36 +166,193 @@ const TrustbitWebshop = {
         $searchInput.on('keydown', (e) => {
             this.handleSearchKeyboard(e);
         });
+
+        // Filters narrow the suggestions too
+        $('#kgs-search-type, #kgs-search-school, #kgs-search-class').on('change', () => {
+            $searchInput.trigger('input');
+        });
     },
 
     async performSearch(query) {
-        if (query.length < this.config.searchMinChars) {
+        if (query.trim().length < this.config.searchMinChars) {
             this.showRecentSearches();
             return;
         }
 
+        // A newer query supersedes the one in flight
+        this.abortSearch();
+        const controller = new AbortController();
+        this.state.searchController = controller;
         this.state.isSearching = true;
         this.showSearchLoading();
 
+        const started = performance.now();
         try {
-            const response = await frappe.call({
-                method: 'trustbit_website_school.api.webshop.search_items',
-                args: {
-                    query: query,
-                    filters: this.getSearchFilters(),
-                    limit: 10
-                }
-            });
+            const results = await this.fetchSuggestions(query, controller.signal);
+            this.recordSearchLatency(performance.now() - started);
+            this.setCachedResults(query, results);
 
-            this.renderSearchResults(response.message || []);
+            if (query === this.state.searchQuery) {
+                this.renderSearchResults(results);
+            }
         } catch (error) {
+            if (error.name === 'AbortError') return;
             console.error('Search error:', error);
             this.showSearchError();
         } finally {
+            if (this.state.searchController === controller) {
+                this.state.searchController = null;
+                this.state.isSearching = false;
+            }
+        }
+    },
+
+    async fetchSuggestions(query, signal) {
+        // Suggestions come from the in-memory prefix index; the full
+        // search_items query only runs on the search page
+        const params = new URLSearchParams({
+            query: query,
+            limit: this.config.searchLimit,
+            filters: JSON.stringify(this.getSearchFilters()),
+        });
+        const response = await fetch(
+            `/api/method/trustbit_website_school.api.webshop.autocomplete?${params.toString()}`,
+            { signal: signal, headers: { Accept: 'application/json' } }
+        );
+
+        if (!response.ok) {
+            throw new Error(`Search failed with status ${response.status}`);
+        }
+
+        return (await response.json()).message || [];
+    },
+
+    abortSearch() {
+        if (this.state.searchController) {
+            this.state.searchController.abort();
+            this.state.searchController = null;
             this.state.isSearching = false;
         }
     },
 
+    getDebounceDelay() {
+        const { debounceDelay, minDebounceDelay, maxDebounceDelay } = this.config;
+        if (this.state.searchLatency === null) return debounceDelay;
+
+        return Math.round(Math.min(Math.max(this.state.searchLatency, minDebounceDelay), maxDebounceDelay));
+    },
+
+    recordSearchLatency(ms) {
+        // Exponential moving average, so one slow response does not dominate
+        const previous = this.state.searchLatency;
+        this.state.searchLatency = previous === null ? ms : previous * 0.7 + ms * 0.3;
+    },
+
+    // ================================
+    // SEARCH CACHE
+    // ================================
+
+    getCachedResults(query) {
+        const scope = this.getSearchScope();
+        const key = this.normalizeQuery(query);
+        const exact = this.getSearchCacheEntry(scope + key);
+        if (exact) return exact.results;
+
+        // A complete (untruncated) result list for a prefix of the query
+        // contains every match of the query, so filter it locally
+        for (let length = key.length - 1; length >= this.config.searchMinChars; length--) {
+            const entry = this.getSearchCacheEntry(scope + key.slice(0, length));
+            if (!entry || entry.results.length >= this.config.searchLimit) continue;
+
+            const results = entry.results.filter((item) => this.matchesSearch(item, key));
+            // No local match may still be a barcode hit, which only the server knows
+            if (!results.length && entry.results.length) return null;
+
+            this.setCachedResults(key, results);
+            return results;
+        }
+
+        return null;
+    },
+
+    matchesSearch(item, key) {
+        // Mirrors the server prefix index: item code, full name, or any word of the name
+        const code = (item.item_code || '').toLowerCase();
+        const name = (item.item_name || '').toLowerCase();
+        return code.startsWith(key)
+            || name.startsWith(key)
+            || (name.match(/[\p{L}\p{N}_]+/gu) || []).some((word) => word.startsWith(key));
+    },
+
+    getSearchCacheEntry(key) {
+        const cache = this.state.searchCache;
+        const entry = cache.get(key);
+        if (!entry) return null;
+
+        if (Date.now() - entry.time > this.config.searchCacheTTL) {
+            cache.delete(key);
+            return null;
+        }
+
+        // Map keeps insertion order: re-insert to mark as most recently used
+        cache.delete(key);
+        cache.set(key, entry);
+        return entry;
+    },
+
+    setCachedResults(query, results) {
+        const cache = this.state.searchCache;
+        const key = this.getSearchCacheKey(query);
+        cache.delete(key);
+        cache.set(key, { results: results, time: Date.now() });
+
+        while (cache.size > this.config.searchCacheSize) {
+            cache.delete(cache.keys().next().value);
+        }
+
+        this.saveSearchCache();
+    },
+
+    getSearchCacheKey(query) {
+        return this.getSearchScope() + this.normalizeQuery(query);
+    },
+
+    getSearchScope() {
+        // Suggestions differ per filter combination
+        const filters = this.getSearchFilters();
+        return [filters.type, filters.school, filters.class].map((value) => value || '').join('|') + '|';
+    },
+
+    normalizeQuery(query) {
+        return (query || '').trim().toLowerCase();
+    },
+
+    loadSearchCache() {
+        const entries = this.readStorage(sessionStorage, this.config.searchCacheKey) || [];
+        this.state.searchCache = new Map(entries);
+    },
+
+    saveSearchCache() {
+        this.writeStorage(sessionStorage, this.config.searchCacheKey, Array.from(this.state.searchCache.entries()));
+    },
+
+    readStorage(storage, key) {
+        // Storage can be unavailable (privacy modes) or hold stale JSON
+        try {
+            return JSON.parse(storage.getItem(key));
+        } catch (e) {
+            return null;
+        }
+    },
+
+    writeStorage(storage, key, value) {
+        try {
+            storage.setItem(key, JSON.stringify(value));
+        } catch (e) {
+            // Full or unavailable storage only costs the cache
+        }
+    },
+
     getSearchFilters() {
         const filters = {};
         const $typeFilter = $('#kgs-search-type');
@@ -172,7 +373,7 @@ const TrustbitWebshop = {
             $dropdown.html(`
                 <div class="kgs-search-empty">
                     <span style="font-size: 40px;">🔍</span>
-                    <p>No results found for "${this.state.searchQuery}"</p>
+                    <p>No results found for "${this.escapeHtml(this.state.searchQuery)}"</p>
                 </div>
             `);
         } else {
@@ -191,7 +392,7 @@ const TrustbitWebshop = {
                         <div class="kgs-search-result-image" style="
                             background: ${isBundle ? 'linear-gradient(135deg, #7c3aed, #a855f7)' : '#f0f9ff'};
                         ">
-                            ${item.image ? `<img src="${item.image}" alt="">` : (isBundle ? '📦' : '📖')}
+                            ${item.image ? `<img src="${item.image}" ${item.image_srcset ? `srcset="${item.image_srcset}" sizes="48px"` : ''} alt="">` : (isBundle ? '📦' : '📖')}
                         </div>
                         <div class="kgs-search-result-info">
                             <div class="kgs-search-result-badges">
@@ -201,15 +402,16 @@ const TrustbitWebshop = {
                                 <span class="kgs-item-code">${item.item_code}</span>
                             </div>
                             <div class="kgs-search-result-name">${item.item_name}</div>
+                            ${item.price !== undefined ? `
                             <div class="kgs-search-result-meta">
                                 ${isBundle 
                                     ? `${item.item_count || 0} items` 
                                     : `Stock: ${item.stock || 0}`
                                 }
-                            </div>
+                            </div>` : ''}
                         </div>
                         <div class="kgs-search-result-price">
-                            <div class="price">₹${(item.price || 0).toLocaleString()}</div>
+                            ${item.price !== undefined ? `<div class="price">₹${(item.price || 0).toLocaleString()}</div>` : ''}
                             <span class="kgs-action-badge ${isBundle ? 'bundle' : 'item'}">
                                 ${isBundle ? 'View Bundle' : '+ Add'}
                             </span>
@@ -229,6 +431,8 @@ const TrustbitWebshop = {
             const itemCode = $result.data('item-code');
             const type = $result.data('type');
 
+            this.addRecentSearch(this.state.searchQuery);
+
             if (type === 'bundle') {
                 window.location.href = `/shop/bundles/${itemCode}`;
             } else {
@@ -240,6 +444,18 @@ const TrustbitWebshop = {
         });
     },
 
+    submitSearch(query) {
+        query = (query || '').trim();
+        if (query.length < this.config.searchMinChars) return;
+
+        this.addRecentSearch(query);
+        const params = new URLSearchParams({ q: query });
+        const filters = this.getSearchFilters();
+        if (filters.type) params.set('type', filters.type);
+
+        window.location.href = `/shop/search?${params.toString()}`;
+    },
+
     showSearchTyping() {
         $('#kgs-search-dropdown').html(`
             <div class="kgs-search-typing">
@@ -269,8 +485,81 @@ const TrustbitWebshop = {
     },
 
     showRecentSearches() {
-        // TODO: Implement recent searches from localStorage
-        $('#kgs-search-dropdown').hide();
+        const $dropdown = $('#kgs-search-dropdown');
+        const recent = this.getRecentSearches();
+
+        if (!recent.length) {
+            $dropdown.hide();
+            return;
+        }
+
+        $dropdown.html(`
+            <div class="kgs-search-header">
+                🕘 Recent searches
+                <a href="#" class="kgs-search-recent-clear">Clear</a>
+            </div>
+            ${recent.map((query) => `
+                <div class="kgs-search-recent-item" data-query="${this.escapeHtml(query)}">
+                    🔍 ${this.escapeHtml(query)}
+                </div>
+            `).join('')}
+        `).show();
+    },
+
+    getRecentSearches() {
+        const recent = this.readStorage(localStorage, this.config.recentSearchesKey);
+        return Array.isArray(recent) ? recent : [];
+    },
+
+    addRecentSearch(query) {
+        query = (query || '').trim();
+        if (query.length < this.config.searchMinChars) return;
+
+        const key = query.toLowerCase();
+        const recent = this.getRecentSearches().filter((q) => q.toLowerCase() !== key);
+        recent.unshift(query);
+        this.writeStorage(localStorage, this.config.recentSearchesKey, recent.slice(0, this.config.recentSearchesMax));
+    },
+
+    clearRecentSearches() {
+        try {
+            localStorage.removeItem(this.config.recentSearchesKey);
+        } catch (e) {
+            // Nothing stored
+        }
+    },
+
+    escapeHtml(value) {
+        return $('<div>').text(value || '').html().replace(/"/g, '&quot;');
+    },
+
+    // ================================
+    // PREFETCH
+    // ================================
+
+    schedulePrefetch() {
+        // Guest pages come from the page cache, so prefetching them is cheap;
+        // skip on data-saver and slow connections
+        const connection = navigator.connection || {};
+        if (frappe.session.user !== 'Guest' || connection.saveData
+                || /2g/.test(connection.effectiveType || '')) {
+            return;
+        }
+
+        const idle = window.requestIdleCallback || ((callback) => setTimeout(callback, 2000));
+        idle(() => this.prefetchPopularCategories());
+    },
+
+    prefetchPopularCategories() {
+        // Categories with the most products, picked by the footer template
+        const categories = $('[data-prefetch-categories]').data('prefetch-categories') || [];
+        const urls = categories.map((name) => `/shop/category/${encodeURIComponent(name)}`);
+
+        urls.filter((url) => url !== window.location.pathname)
+            .slice(0, this.config.prefetchCategories)
+            .forEach((url) => {
+                $('<link>', { rel: 'prefetch', href: url, as: 'document' }).appendTo('head');
+            });
     },
 
     handleSearchKeyboard(e) {
@@ -292,7 +581,11 @@ const TrustbitWebshop = {
                 break;
             case 'Enter':
                 e.preventDefault();
-                $selected.click();
+                if ($selected.length && $dropdown.is(':visible')) {
+                    $selected.click();
+                } else {
+                    this.submitSearch(this.state.searchQuery);
+                }
                 break;
             case 'Escape':
                 $dropdown.hide();
@@ -313,11 +606,13 @@ const TrustbitWebshop = {
         if (!frappe.session.user || frappe.session.user === 'Guest') {
             return;
         }
+        // Cached count and total only; the full Quotation is loaded on /shop/cart
         frappe.call({
-            method: 'webshop.webshop.shopping_cart.cart.get_cart_quotation',
+            method: 'trustbit_website_school.api.webshop.get_cart_summary',
+            type: 'GET',
             callback: (r) => {
-                if (r.message && r.message.doc) {
-                    this.updateCartUI(r.message.doc.items || []);
+                if (r.message) {
+                    this.updateCartUI(r.message);
                 }
             },
             error: () => {
@@ -351,7 +646,7 @@ const TrustbitWebshop = {
                     `✅ ${result.message}`,
                     result.skipped.length > 0 ? 'warning' : 'success'
                 );
-                this.loadCart();
+                this.updateCartUI(result.cart);
             } else {
                 this.showNotification('❌ Failed to add bundle', 'error');
             }
@@ -393,21 +688,21 @@ const TrustbitWebshop = {
         }
     },
 
-    updateCartUI(items) {
-        const count = items.reduce((sum, item) => sum + item.qty, 0);
+    updateCartUI(summary) {
+        const count = (summary && summary.count) || 0;
         const $cartBtn = $('.kgs-cart-btn');
         const $cartCount = $cartBtn.find('.kgs-cart-count');
 
         if (count > 0) {
             $cartBtn.addClass('has-items');
             if ($cartCount.length) {
-                $cartCount.text(count);
+                $cartCount.text(count).show();
             } else {
                 $cartBtn.append(`<span class="kgs-cart-count">${count}</span>`);
             }
         } else {
             $cartBtn.removeClass('has-items');
-            $cartCount.remove();
+            $cartCount.hide();
         }
     },
 
@@ -4,35 +4,28 @@
 import frappe
 from frappe.utils import add_days, today
 
+from trustbit_website_school.trustbit_website_school.doctype.trustbit_settings.trustbit_settings import get_trustbit_settings
+
 
 def update_trending_products():
-    """Daily task to update trending products cache"""
-    settings = frappe.get_single("Trustbit Settings")
+    """Daily task to reconcile the sales rollup and refresh the trending cache"""
+    from trustbit_website_school.api.webshop import TRENDING_CACHE_KEY, get_trending_sales_cached
+    from trustbit_website_school.trustbit_website_school.doctype.trustbit_item_sales.trustbit_item_sales import (
+        prune_item_sales, rebuild_item_sales
+    )
+    
+    settings = get_trustbit_settings()
     days = settings.trending_days_range or 30
     limit = settings.trending_products_count or 8
     
-    from_date = add_days(today(), -days)
-    
-    trending = frappe.db.sql("""
-        SELECT 
-            sii.item_code,
-            SUM(sii.qty) as total_qty
-        FROM `tabSales Invoice Item` sii
-        INNER JOIN `tabSales Invoice` si ON si.name = sii.parent
-        WHERE si.docstatus = 1
-            AND si.posting_date >= %s
-            AND EXISTS (
-                SELECT 1 FROM `tabItem` i 
-                WHERE i.item_code = sii.item_code 
-                AND i.show_in_website = 1 
-                AND i.disabled = 0
-            )
-        GROUP BY sii.item_code
-        ORDER BY total_qty DESC
-        LIMIT %s
-    """, (from_date, limit), as_dict=True)
+    # Buckets are maintained on invoice submit/cancel; recomputing the
+    # trending window daily corrects any drift (e.g. invoices amended in SQL)
+    rebuild_item_sales(add_days(today(), -days))
+    prune_item_sales()
+    frappe.db.commit()
     
-    frappe.cache().set_value("trustbit_trending_products", trending, expires_in_sec=86400)
+    frappe.cache().delete_keys(TRENDING_CACHE_KEY)
+    trending = get_trending_sales_cached(limit, days)
     
     frappe.log_error(
         message=f"Updated trending products cache: {len(trending)} items",
@@ -1,10 +1,10 @@
-import frappe
 from trustbit_website_school.api.webshop import get_categories
 from trustbit_website_school.trustbit_website_school.doctype.trustbit_team_member.trustbit_team_member import get_team_members
+from trustbit_website_school.trustbit_website_school.doctype.trustbit_settings.trustbit_settings import get_trustbit_settings
 
 def get_context(context):
     """About Us page context"""
-    settings = frappe.get_single("Trustbit Settings")
+    settings = get_trustbit_settings()
     
     context.no_cache = 1
     context.active_page = "about"
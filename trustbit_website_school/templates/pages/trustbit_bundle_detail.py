@@ -1,9 +1,10 @@
 import frappe
 from trustbit_website_school.api.webshop import get_bundle_detail, get_categories
+from trustbit_website_school.trustbit_website_school.doctype.trustbit_settings.trustbit_settings import get_trustbit_settings
 
 def get_context(context):
     """Bundle detail page context"""
-    settings = frappe.get_single("Trustbit Settings")
+    settings = get_trustbit_settings()
     bundle_id = frappe.form_dict.get("bundle_id")
     
     if not bundle_id:
@@ -1,31 +1,22 @@
 import frappe
+from urllib.parse import urlencode
 from frappe.utils import cint
 from trustbit_website_school.api.webshop import get_bundles, get_categories
+from trustbit_website_school.trustbit_website_school.doctype.trustbit_settings.trustbit_settings import get_trustbit_settings
 
 def get_context(context):
     """Bundles page context"""
-    settings = frappe.get_single("Trustbit Settings")
+    settings = get_trustbit_settings()
     page = cint(frappe.form_dict.get("page", 1))
+    after = frappe.form_dict.get("after")
+    school = frappe.form_dict.get("school")
+    school_class = frappe.form_dict.get("class")
     
-    # Get bundles with pagination
-    result = get_bundles(limit=12, page=page)
-    
-    # Get unique schools and classes for filters
-    schools = frappe.db.sql("""
-        SELECT DISTINCT i.trustbit_school 
-        FROM `tabProduct Bundle` pb
-        INNER JOIN `tabItem` i ON i.item_code = pb.new_item_code
-        WHERE i.trustbit_school IS NOT NULL AND i.trustbit_school != ''
-        ORDER BY i.trustbit_school
-    """, as_dict=True)
-    
-    classes = frappe.db.sql("""
-        SELECT DISTINCT i.trustbit_class 
-        FROM `tabProduct Bundle` pb
-        INNER JOIN `tabItem` i ON i.item_code = pb.new_item_code
-        WHERE i.trustbit_class IS NOT NULL AND i.trustbit_class != ''
-        ORDER BY i.trustbit_class
-    """, as_dict=True)
+    # Bundles, total and school/class facet counts for the current filters
+    result = get_bundles(
+        limit=12, page=page, after=after, school=school, school_class=school_class, with_facets=1
+    )
+    filters = {k: v for k, v in {"school": school, "class": school_class}.items() if v}
     
     context.no_cache = 1
     context.active_page = "bundles"
@@ -34,8 +25,12 @@ def get_context(context):
     context.total = result["total"]
     context.page = result["page"]
     context.total_pages = result["total_pages"]
-    context.schools = [s["trustbit_school"] for s in schools]
-    context.classes = [c["trustbit_class"] for c in classes]
+    context.next_cursor = result["next_cursor"]
+    context.schools = result["facets"]["school"]
+    context.classes = result["facets"]["class"]
+    context.selected_school = school
+    context.selected_class = school_class
+    context.filter_query = "&" + urlencode(filters) if filters else ""
     context.categories = get_categories()
     
     return context
@@ -1,12 +1,13 @@
 import frappe
 from webshop.webshop.shopping_cart.cart import get_cart_quotation
 from trustbit_website_school.api.webshop import get_categories
+from trustbit_website_school.trustbit_website_school.doctype.trustbit_settings.trustbit_settings import get_trustbit_settings
 
 no_cache = 1
 
 def get_context(context):
     """Cart page context"""
-    settings = frappe.get_single("Trustbit Settings")
+    settings = get_trustbit_settings()
 
     context.no_cache = 1
     context.active_page = "cart"
@@ -1,9 +1,9 @@
-import frappe
 from trustbit_website_school.api.webshop import get_categories
+from trustbit_website_school.trustbit_website_school.doctype.trustbit_settings.trustbit_settings import get_trustbit_settings
 
 def get_context(context):
     """Categories listing page context"""
-    settings = frappe.get_single("Trustbit Settings")
+    settings = get_trustbit_settings()
     
     categories = get_categories()
     
@@ -1,13 +1,15 @@
 import frappe
 from frappe.utils import cint
 from trustbit_website_school.api.webshop import get_category_products, get_categories
+from trustbit_website_school.trustbit_website_school.doctype.trustbit_settings.trustbit_settings import get_trustbit_settings
 
 def get_context(context):
     """Category products page context"""
-    settings = frappe.get_single("Trustbit Settings")
+    settings = get_trustbit_settings()
     category = frappe.form_dict.get("category")
     page = cint(frappe.form_dict.get("page", 1))
     sort_by = frappe.form_dict.get("sort", "item_name")
+    after = frappe.form_dict.get("after")
     
     if not category:
         frappe.throw("Category not found", frappe.PageDoesNotExistError)
@@ -19,7 +21,7 @@ def get_context(context):
     if not frappe.db.exists("Item Group", category):
         frappe.throw("Category not found", frappe.PageDoesNotExistError)
     
-    result = get_category_products(category, limit=20, page=page, sort_by=sort_by)
+    result = get_category_products(category, limit=20, page=page, sort_by=sort_by, after=after)
     
     context.no_cache = 1
     context.active_page = "categories"
@@ -29,6 +31,7 @@ def get_context(context):
     context.total = result["total"]
     context.page = result["page"]
     context.total_pages = result["total_pages"]
+    context.next_cursor = result["next_cursor"]
     context.sort_by = sort_by
     context.categories = get_categories()
     
@@ -1,10 +1,11 @@
 import frappe
 from frappe.utils import cint
 from trustbit_website_school.api.webshop import get_categories, get_order_history
+from trustbit_website_school.trustbit_website_school.doctype.trustbit_settings.trustbit_settings import get_trustbit_settings
 
 def get_context(context):
     """Order history page context"""
-    settings = frappe.get_single("Trustbit Settings")
+    settings = get_trustbit_settings()
     page = cint(frappe.form_dict.get("page", 1))
     
     context.no_cache = 1
@@ -14,15 +15,17 @@ def get_context(context):
     
     # Only fetch orders if logged in
     if frappe.session.user != "Guest":
-        result = get_order_history(limit=10, page=page)
+        result = get_order_history(limit=10, page=page, after=frappe.form_dict.get("after"))
         context.orders = result.get("orders", [])
         context.total = result.get("total", 0)
         context.page = page
         context.total_pages = result.get("total_pages", 1)
+        context.next_cursor = result.get("next_cursor")
     else:
         context.orders = []
         context.total = 0
         context.page = 1
         context.total_pages = 1
+        context.next_cursor = None
     
     return context
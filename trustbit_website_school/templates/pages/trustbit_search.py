@@ -1,9 +1,10 @@
 import frappe
 from trustbit_website_school.api.webshop import get_categories, search_items
+from trustbit_website_school.trustbit_website_school.doctype.trustbit_settings.trustbit_settings import get_trustbit_settings
 
 def get_context(context):
     """Search results page context"""
-    settings = frappe.get_single("Trustbit Settings")
+    settings = get_trustbit_settings()
     query = frappe.form_dict.get("q", "").strip()
     item_type = frappe.form_dict.get("type", "")
     category = frappe.form_dict.get("category", "")
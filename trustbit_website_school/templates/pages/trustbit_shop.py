@@ -1,29 +1,25 @@
-import frappe
-from trustbit_website_school.api.webshop import (
-    get_categories, get_latest_products, get_trending_products, 
-    get_store_stats, get_active_banners
-)
+from trustbit_website_school.api.webshop import get_homepage_sections
+from trustbit_website_school.trustbit_website_school.doctype.trustbit_settings.trustbit_settings import get_trustbit_settings
 
 def get_context(context):
     """Homepage context"""
-    settings = frappe.get_single("Trustbit Settings")
+    settings = get_trustbit_settings()
+    sections = get_homepage_sections()
     
     context.no_cache = 1
     context.active_page = "home"
     context.settings = settings
-    context.categories = get_categories()[:6]  # Top 6 categories
-    context.stats = get_store_stats()
-    context.banners = get_active_banners()
+    context.hero = sections["hero"]
+    context.categories = sections["categories"][:6]  # Top 6 categories
+    context.stats = sections["stats"]
+    context.banners = sections["banners"]
     
     # Latest products
     if settings.show_latest_products:
-        context.latest_products = get_latest_products(settings.latest_products_count or 8)
+        context.latest_products = sections["latest_products"]
     
     # Trending products
     if settings.show_trending_products:
-        context.trending_products = get_trending_products(
-            settings.trending_products_count or 8,
-            settings.trending_days_range or 30
-        )
+        context.trending_products = sections["trending_products"]
     
     return context
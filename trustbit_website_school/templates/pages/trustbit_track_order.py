@@ -1,9 +1,10 @@
 import frappe
 from trustbit_website_school.api.webshop import get_categories, track_order
+from trustbit_website_school.trustbit_website_school.doctype.trustbit_settings.trustbit_settings import get_trustbit_settings
 
 def get_context(context):
     """Order tracking page context"""
-    settings = frappe.get_single("Trustbit Settings")
+    settings = get_trustbit_settings()
     order_id = frappe.form_dict.get("order_id")
     
     context.no_cache = 1
@@ -1,9 +1,22 @@
 # Copyright (c) 2024, Trustbit and contributors
 # For license information, please see license.txt
 
+import datetime
+
 import frappe
 from frappe.model.document import Document
-from frappe.utils import today, getdate
+from frappe.utils import add_days, getdate, now_datetime, today
+
+from trustbit_website_school.images import add_image_variants
+
+ACTIVE_BANNERS_CACHE_KEY = "trustbit_active_banners"
+# Upper bound for the cache lifetime when no banner starts or ends soon
+ACTIVE_BANNERS_MAX_TTL = 24 * 60 * 60
+
+BANNER_FIELDS = [
+    "name", "title", "subtitle", "image", "image_alt_text",
+    "button_text", "button_link", "button_style", "open_in_new_tab"
+]
 
 
 class TrustbitBanner(Document):
@@ -12,31 +25,82 @@ class TrustbitBanner(Document):
             if getdate(self.end_date) < getdate(self.start_date):
                 frappe.throw("End date cannot be before start date")
 
+    def on_update(self):
+        clear_banner_cache()
+
+    def on_trash(self):
+        clear_banner_cache()
+
 
 @frappe.whitelist(allow_guest=True)
 def get_banners():
     """Get active banners for frontend"""
-    today_date = today()
-    
+    banners = frappe.cache().get_value(ACTIVE_BANNERS_CACHE_KEY)
+    if banners is None:
+        banners, expires_in = build_active_banners()
+        frappe.cache().set_value(ACTIVE_BANNERS_CACHE_KEY, banners, expires_in_sec=expires_in)
+
+    return banners
+
+
+def get_banner_cache_ttl():
+    """Seconds until the cached active banners expire at the next start or end date"""
+    get_banners()
+
+    cache = frappe.cache()
+    # Raw pipeline command: RedisWrapper has no prefixing TTL helper
+    pipe = cache.pipeline()
+    pipe.ttl(cache.make_key(ACTIVE_BANNERS_CACHE_KEY))
+    (seconds,) = pipe.execute()
+
+    # -2: dropped meanwhile by a banner change, which also bumps the tag
+    return max(seconds, 1)
+
+
+def build_active_banners():
+    """Active banners for today, and seconds until the set next changes"""
+    today_date = getdate(today())
+
+    # Current and upcoming banners; expired ones can never become active again
     banners = frappe.get_all(
         "Trustbit Banner",
         filters={"is_active": 1},
         or_filters=[
-            ["start_date", "is", "not set"],
-            ["start_date", "<=", today_date]
-        ],
-        fields=[
-            "name", "title", "subtitle", "image", "image_alt_text",
-            "button_text", "button_link", "button_style", "open_in_new_tab"
+            ["end_date", "is", "not set"],
+            ["end_date", ">=", today_date]
         ],
+        fields=BANNER_FIELDS + ["start_date", "end_date"],
         order_by="display_order asc"
     )
-    
-    # Filter out expired banners
+
     active_banners = []
+    boundaries = []
     for banner in banners:
-        doc = frappe.get_doc("Trustbit Banner", banner.name)
-        if not doc.end_date or getdate(doc.end_date) >= getdate(today_date):
-            active_banners.append(banner)
-    
-    return active_banners
+        start_date = banner.pop("start_date")
+        end_date = banner.pop("end_date")
+
+        if start_date and getdate(start_date) > today_date:
+            boundaries.append(getdate(start_date))
+            continue
+
+        active_banners.append(banner)
+        if end_date:
+            # Still shown on its end date, gone the day after
+            boundaries.append(getdate(add_days(end_date, 1)))
+
+    add_image_variants(active_banners)
+    return active_banners, get_seconds_until(min(boundaries) if boundaries else None)
+
+
+def get_seconds_until(boundary_date):
+    """Seconds from now until the start of boundary_date, capped at a day"""
+    if not boundary_date:
+        return ACTIVE_BANNERS_MAX_TTL
+
+    boundary = datetime.datetime.combine(boundary_date, datetime.time.min)
+    seconds = int((boundary - now_datetime()).total_seconds())
+    return min(max(seconds, 1), ACTIVE_BANNERS_MAX_TTL)
+
+
+def clear_banner_cache():
+    frappe.cache().delete_value(ACTIVE_BANNERS_CACHE_KEY)
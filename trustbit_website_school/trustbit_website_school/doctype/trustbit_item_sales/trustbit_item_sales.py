@@ -0,0 +1,93 @@
+# Copyright (c) 2024, Trustbit and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import add_days, cint, flt, now, today
+
+# Buckets older than this are pruned by the daily task
+RETENTION_DAYS = 400
+
+
+class TrustbitItemSales(Document):
+    pass
+
+
+def on_doctype_update():
+    """Covering index for summing buckets over a date window"""
+    frappe.db.add_index("Trustbit Item Sales", ["sales_date", "item_code", "qty"], "sales_date_item_qty")
+
+
+def get_bucket_name(item_code, sales_date):
+    return f"{sales_date}::{item_code}"
+
+
+def update_item_sales(doc, method=None):
+    """Sales Invoice doc_event: add (on_submit) or remove (on_cancel) the day's sold qty"""
+    sign = -1 if method == "on_cancel" else 1
+
+    qty_by_item = {}
+    for row in doc.items:
+        qty_by_item[row.item_code] = qty_by_item.get(row.item_code, 0) + flt(row.qty)
+
+    if qty_by_item:
+        add_to_buckets(doc.posting_date, {code: sign * qty for code, qty in qty_by_item.items()})
+
+
+def add_to_buckets(sales_date, qty_by_item):
+    """Increment the daily buckets of several items with one statement"""
+    timestamp = now()
+    values = []
+    for item_code, qty in qty_by_item.items():
+        values.extend((
+            get_bucket_name(item_code, sales_date), timestamp, timestamp,
+            "Administrator", "Administrator", item_code, sales_date, qty
+        ))
+
+    frappe.db.sql(f"""
+        INSERT INTO `tabTrustbit Item Sales`
+            (name, creation, modified, owner, modified_by, item_code, sales_date, qty)
+        VALUES {", ".join(["(%s, %s, %s, %s, %s, %s, %s, %s)"] * len(qty_by_item))}
+        ON DUPLICATE KEY UPDATE
+            qty = qty + VALUES(qty),
+            modified = VALUES(modified)
+    """, values)
+
+
+def rebuild_item_sales(from_date):
+    """Recompute all buckets since from_date from submitted invoices"""
+    frappe.db.delete("Trustbit Item Sales", {"sales_date": [">=", from_date]})
+    frappe.db.sql("""
+        INSERT INTO `tabTrustbit Item Sales`
+            (name, creation, modified, owner, modified_by, item_code, sales_date, qty)
+        SELECT
+            CONCAT(si.posting_date, '::', sii.item_code), NOW(), NOW(),
+            'Administrator', 'Administrator', sii.item_code, si.posting_date, SUM(sii.qty)
+        FROM `tabSales Invoice Item` sii
+        INNER JOIN `tabSales Invoice` si ON si.name = sii.parent
+        WHERE si.docstatus = 1
+            AND si.posting_date >= %s
+        GROUP BY si.posting_date, sii.item_code
+    """, from_date)
+
+
+def prune_item_sales():
+    """Remove buckets older than the retention window"""
+    frappe.db.delete("Trustbit Item Sales", {"sales_date": ["<", add_days(today(), -RETENTION_DAYS)]})
+
+
+def get_trending_sales(limit=8, days=30):
+    """Top sold enabled items over the last N days, summed from daily buckets"""
+    return frappe.db.sql("""
+        SELECT
+            s.item_code,
+            SUM(s.qty) as total_qty
+        FROM `tabTrustbit Item Sales` s
+        INNER JOIN `tabItem` i ON i.name = s.item_code
+        WHERE s.sales_date >= %s
+            AND i.disabled = 0
+        GROUP BY s.item_code
+        HAVING total_qty > 0
+        ORDER BY total_qty DESC
+        LIMIT %s
+    """, (add_days(today(), -cint(days)), cint(limit)), as_dict=True)
@@ -0,0 +1,313 @@
+# Copyright (c) 2024, Trustbit and contributors
+# For license information, please see license.txt
+
+import re
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import cint, now, strip_html_tags
+
+from trustbit_website_school.autocomplete import clear_autocomplete_snapshot, drop_autocomplete_snapshot
+from trustbit_website_school.facets import clear_facet_counts, update_facet_counts
+
+FULLTEXT_INDEX = "search_text_fulltext"
+REBUILD_CHUNK_SIZE = 2000
+DESCRIPTION_LENGTH = 500
+# Fallback when the server's innodb_ft_min_token_size cannot be read
+DEFAULT_FT_MIN_TOKEN_SIZE = 3
+FT_MIN_TOKEN_SIZE_KEY = "trustbit_ft_min_token_size"
+
+# InnoDB's default FULLTEXT stopwords (INFORMATION_SCHEMA.INNODB_FT_DEFAULT_STOPWORD).
+# They are never indexed, so requiring one in BOOLEAN MODE matches nothing.
+FT_STOPWORDS = frozenset((
+    "a", "about", "an", "are", "as", "at", "be", "by", "com", "de", "en", "for",
+    "from", "how", "i", "in", "is", "it", "la", "of", "on", "or", "that", "the",
+    "this", "to", "was", "what", "when", "where", "who", "will", "with", "und", "www",
+))
+
+FACET_FIELDS = ("item_group", "trustbit_school", "trustbit_class", "is_sales_item", "is_bundle")
+# Index columns copied into the autocomplete snapshot (besides the item image)
+AUTOCOMPLETE_FIELDS = ("item_name", "barcode", "trustbit_school", "trustbit_class", "is_sales_item", "is_bundle")
+
+INDEX_FIELDS = (
+    "item_code", "item_name", "item_group", "barcode", "trustbit_school",
+    "trustbit_class", "is_sales_item", "is_bundle", "search_text",
+)
+
+
+class TrustbitSearchIndex(Document):
+    pass
+
+
+def on_doctype_update():
+    """Add the FULLTEXT index used for relevance ranked search"""
+    if not frappe.db.sql(
+        "SHOW INDEX FROM `tabTrustbit Search Index` WHERE Key_name = %s", FULLTEXT_INDEX
+    ):
+        frappe.db.sql_ddl(f"""
+            ALTER TABLE `tabTrustbit Search Index`
+            ADD FULLTEXT INDEX `{FULLTEXT_INDEX}` (search_text)
+        """)
+
+
+# ============================================
+# SEARCH
+# ============================================
+
+def search_index(query, filters=None, limit=10, bundles=False):
+    """Search indexed items (or bundles) ranked by relevance"""
+    filters = filters or {}
+    terms, short_tokens = get_search_terms(query)
+    params = {}
+
+    conditions = ["idx.is_bundle = 1" if bundles else "idx.is_sales_item = 1"]
+    if terms:
+        score = "MATCH(idx.search_text) AGAINST (%(terms)s IN BOOLEAN MODE)"
+        conditions.append(score)
+        # Tokens the FULLTEXT index cannot see ("a4", "hb", "5") still have to
+        # start a word, checked on the rows the MATCH already narrowed down
+        for n, token in enumerate(short_tokens):
+            # \w tokens can only carry the "_" wildcard
+            params[f"word_{n}"] = "% {0}%".format(token.replace("_", "\\_"))
+            conditions.append(f"CONCAT(' ', idx.search_text) LIKE %(word_{n})s")
+    else:
+        # Nothing the FULLTEXT index can match: fall back to indexed prefix matches
+        score = "0"
+        conditions.append("(idx.item_code LIKE %(starts)s OR idx.item_name LIKE %(starts)s)")
+
+    if filters.get("item_group"):
+        conditions.append("idx.item_group = %(item_group)s")
+    if filters.get("school"):
+        conditions.append("idx.trustbit_school = %(school)s")
+    if filters.get("class"):
+        conditions.append("idx.trustbit_class = %(class)s")
+
+    return frappe.db.sql(f"""
+        SELECT
+            i.item_code, i.item_code as new_item_code, i.item_name, i.item_group,
+            i.image, i.description, i.stock_uom, idx.barcode
+        FROM `tabTrustbit Search Index` idx
+        INNER JOIN `tabItem` i ON i.name = idx.item_code
+        WHERE {" AND ".join(conditions)}
+        ORDER BY
+            idx.item_code = %(exact)s DESC,
+            idx.item_code LIKE %(starts)s DESC,
+            idx.item_name LIKE %(starts)s DESC,
+            {score} DESC,
+            idx.item_name ASC
+        LIMIT %(limit)s
+    """, {
+        "terms": terms,
+        "exact": query,
+        "starts": f"{query}%",
+        "item_group": filters.get("item_group"),
+        "school": filters.get("school"),
+        "class": filters.get("class"),
+        "limit": cint(limit),
+        **params
+    }, as_dict=True)
+
+
+def get_search_terms(query):
+    """Split a user query into a BOOLEAN MODE prefix search and unindexable tokens
+
+    "a4 notebook for class 5" -> ("+notebook* +class*", ["a4", "5"]). Tokens
+    shorter than innodb_ft_min_token_size are not in the FULLTEXT index, so
+    they are returned separately; stopwords are dropped.
+    """
+    min_size = get_ft_min_token_size()
+    terms = []
+    short_tokens = []
+    for token in re.findall(r"\w+", (query or "").lower()):
+        if token in FT_STOPWORDS:
+            continue
+        if len(token) >= min_size:
+            terms.append(f"+{token}*")
+        else:
+            short_tokens.append(token)
+
+    return " ".join(terms), short_tokens
+
+
+def get_ft_min_token_size():
+    return frappe.cache().get_value(FT_MIN_TOKEN_SIZE_KEY, generator=read_ft_min_token_size)
+
+
+def read_ft_min_token_size():
+    try:
+        return cint(frappe.db.sql("SELECT @@innodb_ft_min_token_size")[0][0]) or DEFAULT_FT_MIN_TOKEN_SIZE
+    except Exception:
+        return DEFAULT_FT_MIN_TOKEN_SIZE
+
+
+def build_search_text(item, barcodes=None):
+    """Flatten searchable item fields into one lower-case text blob"""
+    code = item.get("item_code") or ""
+    parts = [
+        code,
+        # Split codes like "NB-A4-200" so each segment is searchable
+        re.sub(r"[-_/.]+", " ", code),
+        item.get("item_name"),
+        item.get("item_group"),
+        item.get("trustbit_school"),
+        item.get("trustbit_class"),
+        " ".join(barcodes or []),
+        strip_html_tags(item.get("description") or "")[:DESCRIPTION_LENGTH],
+    ]
+    return " ".join(p for p in parts if p).lower()
+
+
+# ============================================
+# INDEX MAINTENANCE
+# ============================================
+
+def update_item_index(doc, method=None):
+    """Item doc_event: keep the item's index row in sync"""
+    if method == "on_trash" or doc.disabled:
+        remove_from_index(doc.name)
+        return
+
+    barcodes = [row.barcode for row in doc.get("barcodes") or [] if row.barcode]
+    is_bundle = frappe.db.exists("Product Bundle", {"new_item_code": doc.name})
+    update_index_row(get_index_row(doc, barcodes, is_bundle), image_changed=doc.has_value_changed("image"))
+
+
+def rename_item_index(doc, method=None, old=None, new=None, merge=False):
+    """Item after_rename doc_event: move the index row to the new code"""
+    remove_from_index(old)
+    index_item_code(new)
+
+
+def update_bundle_index(doc, method=None):
+    """Product Bundle doc_event: flag or unflag the bundle item"""
+    index_item_code(doc.new_item_code, is_bundle=method != "on_trash")
+
+
+def index_item_code(item_code, is_bundle=None):
+    """(Re)index a single item by code"""
+    if not item_code or not frappe.db.exists("Item", item_code):
+        return
+
+    item = frappe.get_doc("Item", item_code)
+    if item.disabled:
+        remove_from_index(item_code)
+        return
+
+    if is_bundle is None:
+        is_bundle = frappe.db.exists("Product Bundle", {"new_item_code": item_code})
+
+    barcodes = [row.barcode for row in item.get("barcodes") or [] if row.barcode]
+    update_index_row(get_index_row(item, barcodes, is_bundle))
+
+
+def update_index_row(row, image_changed=False):
+    """Upsert one index row and move it between facet counts"""
+    old_row = get_indexed_values(row["item_code"])
+    upsert_index_rows([row])
+    update_facet_counts(old_row, row)
+
+    # Most Item saves (prices, stock settings, descriptions) leave the
+    # suggestions as they are: keep every worker's prefix index
+    if image_changed or not old_row or any(old_row.get(f) != row.get(f) for f in AUTOCOMPLETE_FIELDS):
+        clear_autocomplete_snapshot()
+
+
+def remove_from_index(item_code):
+    old_row = get_indexed_values(item_code)
+    if not old_row:
+        return
+
+    frappe.db.delete("Trustbit Search Index", {"name": item_code})
+    update_facet_counts(old_row, None)
+    clear_autocomplete_snapshot()
+
+
+def get_indexed_values(item_code):
+    return frappe.db.get_value(
+        "Trustbit Search Index", item_code, FACET_FIELDS + AUTOCOMPLETE_FIELDS[:2], as_dict=True
+    )
+
+
+def get_index_row(item, barcodes=None, is_bundle=False):
+    return {
+        "item_code": item.get("item_code") or item.get("name"),
+        "item_name": item.get("item_name"),
+        "item_group": item.get("item_group"),
+        "barcode": barcodes[0] if barcodes else None,
+        "trustbit_school": item.get("trustbit_school"),
+        "trustbit_class": item.get("trustbit_class"),
+        "is_sales_item": cint(item.get("is_sales_item")),
+        "is_bundle": 1 if is_bundle else 0,
+        "search_text": build_search_text(item, barcodes),
+    }
+
+
+def upsert_index_rows(rows):
+    """Insert or update index rows with a single statement"""
+    if not rows:
+        return
+
+    timestamp = now()
+    columns = ("name", "creation", "modified", "owner", "modified_by") + INDEX_FIELDS
+    values = []
+    for row in rows:
+        values.extend((row["item_code"], timestamp, timestamp, "Administrator", "Administrator"))
+        values.extend(row.get(field) for field in INDEX_FIELDS)
+
+    placeholders = "(" + ", ".join(["%s"] * len(columns)) + ")"
+    updates = ", ".join(
+        f"`{column}` = VALUES(`{column}`)" for column in ("modified",) + INDEX_FIELDS[1:]
+    )
+
+    frappe.db.sql(f"""
+        INSERT INTO `tabTrustbit Search Index` ({", ".join(f"`{c}`" for c in columns)})
+        VALUES {", ".join([placeholders] * len(rows))}
+        ON DUPLICATE KEY UPDATE {updates}
+    """, values)
+
+
+def rebuild_search_index(chunk_size=REBUILD_CHUNK_SIZE):
+    """Rebuild the whole index in chunks, without emptying it first"""
+    started = now()
+    bundles = set(frappe.get_all("Product Bundle", pluck="new_item_code"))
+    last_item_code = ""
+    total = 0
+
+    while True:
+        items = frappe.db.sql("""
+            SELECT
+                name as item_code, item_name, item_group, description,
+                is_sales_item, trustbit_school, trustbit_class
+            FROM `tabItem`
+            WHERE disabled = 0 AND name > %s
+            ORDER BY name
+            LIMIT %s
+        """, (last_item_code, cint(chunk_size)), as_dict=True)
+
+        if not items:
+            break
+
+        barcodes = {}
+        for row in frappe.get_all(
+            "Item Barcode",
+            filters={"parent": ["in", [item.item_code for item in items]]},
+            fields=["parent", "barcode"]
+        ):
+            barcodes.setdefault(row.parent, []).append(row.barcode)
+
+        upsert_index_rows([
+            get_index_row(item, barcodes.get(item.item_code), item.item_code in bundles)
+            for item in items
+        ])
+        frappe.db.commit()
+
+        total += len(items)
+        last_item_code = items[-1].item_code
+
+    # Rows not touched by this run belong to deleted or disabled items
+    frappe.db.sql("DELETE FROM `tabTrustbit Search Index` WHERE modified < %s", started)
+    frappe.db.commit()
+    drop_autocomplete_snapshot()
+    clear_facet_counts()
+
+    return total
@@ -6,18 +6,64 @@ from frappe.model.document import Document
 
 
 class TrustbitSettings(Document):
-    pass
+    def on_update(self):
+        clear_settings_snapshot()
 
 
 def get_settings():
     """Get Trustbit Settings as dict"""
-    return frappe.get_single("Trustbit Settings").as_dict()
+    return get_trustbit_settings().as_dict()
+
+
+def get_trustbit_settings():
+    """Get Trustbit Settings, loaded once per request"""
+    snapshot = get_settings_snapshot()
+    if "settings" not in snapshot:
+        snapshot.settings = frappe.get_cached_doc("Trustbit Settings")
+    
+    return snapshot.settings
+
+
+def get_selling_price_list():
+    """Get default selling price list, loaded once per request"""
+    snapshot = get_settings_snapshot()
+    if "price_list" not in snapshot:
+        snapshot.price_list = frappe.db.get_single_value("Selling Settings", "selling_price_list") or "Standard Selling"
+    
+    return snapshot.price_list
+
+
+def get_default_warehouse():
+    """Get default stock warehouse, loaded once per request"""
+    snapshot = get_settings_snapshot()
+    if "warehouse" not in snapshot:
+        snapshot.warehouse = frappe.db.get_single_value("Stock Settings", "default_warehouse")
+    
+    return snapshot.warehouse
+
+
+def get_settings_snapshot():
+    """Request-local holder for settings used across pages and APIs
+
+    frappe.local is reset for every request and background job, so values
+    stored here never outlive the request that loaded them.
+    """
+    snapshot = getattr(frappe.local, "trustbit_settings_snapshot", None)
+    if snapshot is None:
+        snapshot = frappe.local.trustbit_settings_snapshot = frappe._dict()
+    
+    return snapshot
+
+
+def clear_settings_snapshot(doc=None, method=None):
+    """Drop the request-local settings snapshot (also used as a doc_event)"""
+    frappe.local.trustbit_settings_snapshot = None
 
 
 @frappe.whitelist(allow_guest=True)
 def get_public_settings():
     """Get public settings for frontend"""
-    settings = frappe.get_single("Trustbit Settings")
+    settings = get_trustbit_settings()
     
     return {
         "hero": {
@@ -0,0 +1,178 @@
+# Copyright (c) 2024, Trustbit and contributors
+# For license information, please see license.txt
+
+"""Storefront cache warm-up.
+
+Requests the homepage, category, bundle and top search pages as a guest so
+the guest page cache and the shared data caches (categories, homepage
+sections, counts, bundle summaries) are filled before real visitors arrive,
+e.g. after a deploy or a Redis flush.
+
+Pages are fetched one at a time at a capped rate, and the warmer backs off
+after slow responses so it never competes with live traffic. Run it with
+`bench trustbit-warm-cache` after a deploy or a Redis flush. Sites that want
+the caches kept warm can enable the scheduled run (every 5 minutes, the
+lifetime of most cached pages) with the `trustbit_scheduled_warmup` site
+config flag; each run stops after SCHEDULED_MAX_SECONDS so runs never overlap.
+"""
+
+import re
+import time
+from urllib.parse import quote, urlencode
+
+import frappe
+import requests
+from frappe.utils import get_url
+
+SEARCH_TERMS_KEY = "trustbit_search_terms"
+MAX_TRACKED_TERMS = 500
+MAX_TERM_LENGTH = 50
+
+WARMUP_HEADER = "X-Trustbit-Warmup"
+REQUESTS_PER_SECOND = 2
+REQUEST_TIMEOUT = 30
+# Stop after this many consecutive connection errors (site not reachable)
+MAX_CONNECTION_ERRORS = 3
+MAX_BUNDLES = 200
+TOP_SEARCH_TERMS = 20
+# Scheduled runs start every 5 minutes and must finish before the next one
+SCHEDULED_MAX_SECONDS = 4 * 60
+
+
+# ============================================
+# SEARCH TERM TRACKING
+# ============================================
+
+def record_search_term(query):
+    """Count a search query so the most popular ones can be pre-warmed"""
+    if frappe.request and frappe.get_request_header(WARMUP_HEADER):
+        return
+
+    term = re.sub(r"\s+", " ", (query or "").strip().lower())[:MAX_TERM_LENGTH]
+    if not term:
+        return
+
+    cache = frappe.cache()
+    pipe = cache.pipeline()
+    pipe.zincrby(cache.make_key(SEARCH_TERMS_KEY), 1, term)
+    # Keep only the most searched terms, trimmed in one go once it doubles
+    pipe.zcard(cache.make_key(SEARCH_TERMS_KEY))
+    _score, size = pipe.execute()
+
+    if size > 2 * MAX_TRACKED_TERMS:
+        pipe.zremrangebyrank(cache.make_key(SEARCH_TERMS_KEY), 0, -MAX_TRACKED_TERMS - 1)
+        pipe.execute()
+
+
+def get_top_search_terms(limit=TOP_SEARCH_TERMS):
+    cache = frappe.cache()
+    pipe = cache.pipeline()
+    pipe.zrevrange(cache.make_key(SEARCH_TERMS_KEY), 0, limit - 1)
+    (terms,) = pipe.execute()
+
+    return [term.decode() if isinstance(term, bytes) else term for term in terms]
+
+
+# ============================================
+# WARM-UP
+# ============================================
+
+def warm_storefront_caches():
+    """Scheduler entry point: warm the storefront pages when enabled and log the report"""
+    if not frappe.conf.get("trustbit_scheduled_warmup"):
+        return
+
+    report = warm_caches(max_seconds=SCHEDULED_MAX_SECONDS)
+    frappe.logger("trustbit").info({"event": "storefront_warmup", **report})
+
+
+def warm_caches(requests_per_second=REQUESTS_PER_SECOND, max_seconds=None, log=None):
+    """Fetch every warm-up path as a guest and return a timing report"""
+    interval = 1.0 / requests_per_second if requests_per_second else 0
+    started = time.monotonic()
+    timings = []
+    failed = []
+    connection_errors = 0
+
+    session = requests.Session()
+    session.headers[WARMUP_HEADER] = "1"
+
+    for path in get_warmup_paths():
+        if max_seconds and time.monotonic() - started > max_seconds:
+            break
+
+        request_started = time.monotonic()
+        try:
+            response = session.get(get_url(path), timeout=REQUEST_TIMEOUT)
+            status = response.status_code
+            connection_errors = 0
+        except requests.RequestException as e:
+            status = type(e).__name__
+            connection_errors += 1
+
+        elapsed = time.monotonic() - request_started
+        timings.append((path, elapsed))
+        if status != 200:
+            failed.append({"path": path, "status": status})
+
+        if log:
+            log(f"{status} {elapsed * 1000:8.1f}ms  {path}")
+
+        if connection_errors >= MAX_CONNECTION_ERRORS:
+            break
+
+        # Keep to the request rate, and back off as long as a slow page took
+        time.sleep(max(interval - elapsed, 0) + (elapsed if elapsed > 1 else 0))
+
+    return get_report(timings, failed, time.monotonic() - started)
+
+
+def get_warmup_paths():
+    """Homepage, listings, every category and bundle, and top search terms"""
+    from trustbit_website_school.api.webshop import get_categories
+
+    paths = ["/shop", "/shop/categories", "/shop/bundles"]
+
+    paths.extend(
+        f"/shop/category/{quote(category['name'])}"
+        for category in get_categories()
+        if category.get("count")
+    )
+
+    paths.extend(
+        f"/shop/bundles/{quote(bundle)}"
+        for bundle in frappe.get_all(
+            "Product Bundle",
+            pluck="new_item_code",
+            order_by="modified desc",
+            limit=MAX_BUNDLES
+        )
+    )
+
+    paths.extend(
+        "/shop/search?" + urlencode({"q": term})
+        for term in get_top_search_terms()
+    )
+
+    return paths
+
+
+def get_report(timings, failed, total_seconds):
+    durations = sorted(elapsed * 1000 for _path, elapsed in timings)
+
+    def percentile(p):
+        if not durations:
+            return 0
+        return round(durations[min(len(durations) - 1, int(len(durations) * p))], 1)
+
+    return {
+        "pages": len(timings),
+        "failed": failed,
+        "total_seconds": round(total_seconds, 1),
+        "p50_ms": percentile(0.5),
+        "p95_ms": percentile(0.95),
+        "slowest": [
+            {"path": path, "ms": round(elapsed * 1000, 1)}
+            for path, elapsed in sorted(timings, key=lambda t: t[1], reverse=True)[:5]
+        ],
+    }